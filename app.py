@@ -1,22 +1,48 @@
+from importlib import import_module
 from flask import Flask, jsonify, request
-from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
-from config import Config
+from config import Config, engine_options
 from models import db  
+from utils.cache import response_cache
+from utils.instrumentation import request_metrics
+from utils.revocation import token_denylist
+from utils.rate_limit import rate_limiter
+from utils.compression import response_compression
+from utils.blueprints import LazyBlueprints
 
 # Initialize other extensions
-migrate = Migrate()
 jwt = JWTManager()
 
+BLUEPRINTS = (
+    'routes.auth_routes.auth_bp',
+    'routes.admin_routes.admin_bp',
+    'routes.instructor_routes.instructor_bp',
+    'routes.student_routes.student_bp'
+)
+
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
+
+    # jsonify encodes through the configured provider class
+    module_name, _, class_name = app.config.get('JSON_PROVIDER', 'utils.json_provider.FastJSONProvider').rpartition('.')
+    app.json = getattr(import_module(module_name), class_name)(app)
     
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(
+        app.config['SQLALCHEMY_DATABASE_URI'],
+        app.config.get('POSTGRES_ENGINE_OPTIONS', {}),
+        app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    )
+
     # Initialize Flask extensions
     db.init_app(app)
-    migrate.init_app(app, db)
     jwt.init_app(app)
+    response_cache.init_app(app)
+    request_metrics.init_app(app)
+    token_denylist.init_app(app)
+    rate_limiter.init_app(app)
+    response_compression.init_app(app)
 
     # Configure CORS 
     CORS(app, supports_credentials=True, origins="*", allow_headers="*") 
@@ -36,61 +62,32 @@ def create_app(config_class=Config):
             'message': 'Missing Authorization Header'
         }), 401
 
+    # logged out tokens, checked against the in-process denylist rather than the database
+    @jwt.token_in_blocklist_loader
+    def check_if_token_revoked(_jwt_header, jwt_payload):
+        return token_denylist.is_revoked(jwt_payload)
+
+    @jwt.revoked_token_loader
+    def revoked_token_callback(_jwt_header, jwt_payload):
+        return jsonify({
+            'status': 'error',
+            'message': 'Token has been revoked'
+        }), 401
+
+
+    # Blueprints are imported and registered on the first request, see utils/blueprints.py
+    LazyBlueprints(app, BLUEPRINTS)
+
+    # periodic overdue sweep in this process, off unless OVERDUE_SWEEP_INTERVAL is set
+    from utils.overdue import overdue_scheduler
+    overdue_scheduler.init_app(app)
 
-    # Register blueprints
-    from routes.auth_routes import auth_bp
-    from routes.admin_routes import admin_bp
-    from routes.instructor_routes import instructor_bp
-    from routes.student_routes import student_bp
-
-    app.register_blueprint(auth_bp)
-    app.register_blueprint(admin_bp)
-    app.register_blueprint(instructor_bp)
-    app.register_blueprint(student_bp)
-
-    # Create tables and admin user within app context
-    with app.app_context():
-        from models import User
-        from werkzeug.security import generate_password_hash
-        
-        # Create all tables
-        db.create_all()
-        
-        # Create admin user if it doesn't exist
-        admin = User.query.filter_by(username="ADM-001").first()
-        if not admin:
-            admin = User(
-                username="ADM-001", 
-                password=generate_password_hash("Admin@123"), 
-                role="ADMIN"
-            )
-            db.session.add(admin)
-            db.session.commit()
-            print("Admin user created successfully!")
-
-      # manually create instructor for testing
-        instructor = User.query.filter_by(username="INST-001").first()
-        if not instructor:
-            instructor = User(
-                username="INST-001", 
-                password=generate_password_hash("Instructor@123"), 
-                role="INSTRUCTOR"
-            )
-            db.session.add(instructor)
-            db.session.commit()
-            print("Instructor user created successfully!")
-
-         # manually create student for testing
-        instructor = User.query.filter_by(username="SFT-001").first()
-        if not student:
-            student = User(
-                username="SFT-001", 
-                password=generate_password_hash("Student@123"), 
-                role="STUDENT"
-            )
-            db.session.add(student)
-            db.session.commit()
-            print("Student user created successfully!")
+    # Schema creation, seeding, benchmarks and migrations are CLI steps, only registered under the
+    # flask CLI (ENABLE_CLI_COMMANDS), so building the app never touches the database and WSGI
+    # workers boot without importing the benchmark tooling or alembic
+    if app.config.get('ENABLE_CLI_COMMANDS'):
+        from commands import register_commands
+        register_commands(app)
 
     return app
 
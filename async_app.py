@@ -0,0 +1,39 @@
+from contextlib import asynccontextmanager
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import GZipMiddleware
+from config import Config
+from utils.async_db import async_db
+from utils.revocation import token_denylist
+
+
+# Async read-only tier for the hottest GET endpoints (verify token, student dashboard, lesson lists).
+# It shares models.py and the schemas with the Flask app but runs on an asyncio engine, so one
+# process keeps hundreds of polls in flight while they wait on Postgres. Serve it with an ASGI
+# server, e.g. `uvicorn async_app:app`, and route those paths to it; everything else stays on app.py.
+def create_async_app(config_class=Config):
+    config = {key: getattr(config_class, key) for key in dir(config_class) if key.isupper()}
+    async_db.init_app(config)
+    token_denylist.configure(config)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        await async_db.dispose()
+
+    from routes.async_routes import async_routes
+
+    middleware = [
+        Middleware(CORSMiddleware, allow_origins=['*'], allow_credentials=True, allow_methods=['*'], allow_headers=['*'])
+    ]
+    # gzip only here, Starlette has no brotli middleware
+    if config.get('COMPRESSION_ENABLED', True):
+        middleware.append(Middleware(GZipMiddleware, minimum_size=config.get('COMPRESSION_MIN_SIZE', 1024),
+                                     compresslevel=config.get('COMPRESSION_GZIP_LEVEL', 6)))
+
+    app = Starlette(routes=async_routes, lifespan=lifespan, middleware=middleware)
+    app.state.config = config
+    return app
+
+app = create_async_app()
@@ -0,0 +1,69 @@
+import json
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from benchmarks import datagen, explain, load, serialization
+
+
+@click.group('bench', help='Synthetic data and load benchmarks.')
+def bench_cli():
+    pass
+
+
+# e.g. flask bench seed --students 100000 --lessons 5000 --assignments 1000000 --enrollments 1000000
+@bench_cli.command('seed', help='Fill an empty database (after init-db and seed) with synthetic data.')
+@click.option('--instructors', default=100, show_default=True)
+@click.option('--students', default=10000, show_default=True)
+@click.option('--lessons', default=500, show_default=True)
+@click.option('--assignments', default=100000, show_default=True)
+@click.option('--enrollments', default=100000, show_default=True)
+@click.option('--submissions', default=20000, show_default=True)
+@click.option('--open-ratio', default=0.2, show_default=True, help='Share of assignments with no student.')
+@click.option('--batch-size', default=5000, show_default=True)
+@click.option('--seed', default=42, show_default=True, help='Random seed, the same seed gives the same data.')
+@with_appcontext
+def seed_command(**options):
+    datagen.generate(log=click.echo, **options)
+
+
+@bench_cli.command('run', help='Drive every route of a running server and report throughput and latency percentiles. '
+                  'Start the server with RATE_LIMIT_ENABLED=false, or logins and writes are throttled.')
+@click.option('--url', default='http://localhost:8080', show_default=True)
+@click.option('--concurrency', default=16, show_default=True)
+@click.option('--duration', default=30.0, show_default=True, help='Seconds of timed load.')
+@click.option('--instructors', default=100, show_default=True, help='Seeded instructor count, for picking logins.')
+@click.option('--students', default=10000, show_default=True, help='Seeded student count, for picking logins.')
+@click.option('--route', 'routes', multiple=True, help='Only routes whose name contains this, repeatable.')
+@click.option('--read-only', is_flag=True, help='Skip routes that write.')
+@click.option('--json', 'as_json', is_flag=True, help='Print the report as JSON.')
+def run_command(url, concurrency, duration, instructors, students, routes, read_only, as_json):
+    report = load.run(url, concurrency=concurrency, duration=duration, instructors=instructors,
+                      students=students, routes=routes, read_only=read_only)
+    click.echo(json.dumps(report, indent=2) if as_json else load.format_report(report))
+
+
+@bench_cli.command('serialize', help='Time marshmallow + jsonify against the compiled dumpers + fast JSON provider.')
+@click.option('--rows', default=500, show_default=True, help='Rows per list.')
+@click.option('--repeat', default=5, show_default=True, help='Rounds per measurement, the best one counts.')
+@click.option('--number', default=20, show_default=True, help='Calls per round.')
+@click.option('--json', 'as_json', is_flag=True, help='Print the report as JSON.')
+@with_appcontext
+def serialize_command(rows, repeat, number, as_json):
+    results = serialization.run(current_app._get_current_object(), rows=rows, repeat=repeat, number=number)
+    click.echo(json.dumps(results, indent=2) if as_json else serialization.format_report(results))
+
+
+@bench_cli.command('explain', help='Check that the dashboard, list and enrollment queries use their indexes on the seeded database.')
+@click.option('--no-analyze', is_flag=True, help='Do not ANALYZE the tables first (Postgres).')
+@click.option('--verbose', is_flag=True, help='Print every plan, not only the ones missing their index.')
+@click.option('--json', 'as_json', is_flag=True, help='Print the report as JSON.')
+@with_appcontext
+def explain_command(no_analyze, verbose, as_json):
+    try:
+        results = explain.run(analyze=not no_analyze)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+    click.echo(json.dumps(results, indent=2) if as_json else explain.format_report(results, verbose=verbose))
+    if not all(r['index'] for r in results):
+        raise SystemExit(1)
+
@@ -0,0 +1,145 @@
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import case, func, insert, literal, select
+from werkzeug.security import generate_password_hash
+from models import db, User, Assignment, AssignmentStats, Lesson, Submission, student_lessons
+
+# every synthetic account shares this password, hashing it per row would dominate the seed time
+BENCH_PASSWORD = 'Bench@123'
+BENCH_PREFIX = 'BENCH'
+BASE_DATE = datetime(2026, 1, 1)
+
+
+def bench_username(role, n):
+    return f'{BENCH_PREFIX}-{role[:3]}-{n:07d}'
+
+
+# Fills the database with a reproducible data set: the same seed and scale always produce the same
+# rows. Rows go in through insert(Model) in batches, so column defaults from models.py apply.
+def generate(instructors=100, students=10000, lessons=500, assignments=100000, enrollments=100000,
+             submissions=20000, open_ratio=0.2, batch_size=5000, seed=42, log=print):
+    rng = random.Random(seed)
+    password = generate_password_hash(BENCH_PASSWORD)
+
+    # inserts rows batch by batch; with `returning` columns, the returned rows that pass `keep` are collected
+    def insert_batches(target, rows, label, returning=(), keep=None):
+        returned = []
+        total = 0
+
+        def flush(batch):
+            statement = insert(target)
+            if returning:
+                result = db.session.execute(statement.returning(*returning), batch)
+                returned.extend(row for row in result if keep is None or keep(row))
+            else:
+                db.session.execute(statement, batch)
+            db.session.commit()
+
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                flush(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            flush(batch)
+            total += len(batch)
+        log(f'{label}: {total} rows')
+        return returned
+
+    instructor_ids = [row.id for row in insert_batches(User, (
+        {'username': bench_username('INSTRUCTOR', n), 'password': password, 'role': 'INSTRUCTOR'}
+        for n in range(instructors)
+    ), 'instructors', returning=(User.id,))]
+    student_ids = [row.id for row in insert_batches(User, (
+        {'username': bench_username('STUDENT', n), 'password': password, 'role': 'STUDENT'}
+        for n in range(students)
+    ), 'students', returning=(User.id,))]
+
+    def lesson_rows():
+        for n in range(lessons):
+            content = f'Lesson {n} content. ' * rng.randint(20, 400)
+            yield {
+                'title': f'Lesson {n}',
+                'content': content,
+                'content_length': len(content),
+                'description': f'Synthetic lesson {n}',
+                'due_date': BASE_DATE + timedelta(days=rng.randint(0, 365)),
+                'instructor_id': rng.choice(instructor_ids)
+            }
+
+    lesson_ids = [row.id for row in insert_batches(Lesson, lesson_rows(), 'lessons', returning=(Lesson.id,))]
+
+    # pair k enrolls student k % S in a lesson shifted by the round k // S, unique while
+    # enrollments <= students * lessons, without keeping a set of pairs in memory
+    enrollments = min(enrollments, len(student_ids) * len(lesson_ids))
+    insert_batches(student_lessons, (
+        {
+            'student_id': student_ids[k % len(student_ids)],
+            'lesson_id': lesson_ids[(k % len(student_ids) * 31 + k // len(student_ids)) % len(lesson_ids)]
+        }
+        for k in range(enrollments)
+    ), 'enrollments')
+
+    # the first `submissions` assigned rows are submitted by their student, a third of those graded;
+    # submitting leaves the assignment itself pending
+    def assignment_rows():
+        for n in range(assignments):
+            description = f'Assignment {n} instructions. ' * rng.randint(5, 100)
+            row = {
+                'title': f'Assignment {n}',
+                'description': description,
+                'description_length': len(description),
+                'due_date': BASE_DATE + timedelta(days=rng.randint(0, 365)),
+                'status': 'pending',
+                'instructor_id': rng.choice(instructor_ids),
+                'student_id': None
+            }
+            if rng.random() >= open_ratio:
+                row['student_id'] = rng.choice(student_ids)
+            yield row
+
+    assigned = insert_batches(Assignment, assignment_rows(), 'assignments',
+                              returning=(Assignment.id, Assignment.student_id, Assignment.due_date),
+                              keep=lambda row: row.student_id is not None)
+
+    # handed in between three days early and two days late
+    def submission_rows():
+        for row in assigned[:submissions]:
+            graded = rng.random() < 1 / 3
+            submitted_on = row.due_date + timedelta(seconds=rng.randint(-3 * 86400, 2 * 86400))
+            graded_on = submitted_on + timedelta(days=1) if graded else None
+            yield {
+                'assignment_id': row.id,
+                'student_id': row.student_id,
+                'body': f'Submission for assignment {row.id}',
+                'submitted_on': submitted_on,
+                'updated_on': graded_on or submitted_on,
+                'seconds_late': max(0.0, (submitted_on - row.due_date).total_seconds()),
+                'status': 'graded' if graded else 'submitted',
+                'grade': round(rng.uniform(40, 100), 1) if graded else None,
+                'graded_on': graded_on
+            }
+
+    insert_batches(Submission, submission_rows(), 'submissions')
+
+    # the gradebook aggregates the app keeps current on every submit and grade, built in one
+    # INSERT ... SELECT ... GROUP BY over the submissions
+    graded = (Submission.status == 'graded') & Submission.grade.isnot(None)
+    late = Submission.seconds_late > 0
+    result = db.session.execute(insert(AssignmentStats).from_select(
+        ['assignment_id', 'instructor_id', *AssignmentStats.COUNTERS, 'updated_on'],
+        select(
+            Assignment.id,
+            Assignment.instructor_id,
+            func.count(),
+            func.count(case((graded, 1))),
+            func.coalesce(func.sum(case((graded, Submission.grade))), 0.0),
+            func.count(case((late, 1))),
+            func.coalesce(func.sum(case((late, Submission.seconds_late))), 0.0),
+            literal(datetime.utcnow())
+        ).join(Submission, Submission.assignment_id == Assignment.id).group_by(Assignment.id, Assignment.instructor_id)
+    ))
+    db.session.commit()
+    log(f'assignment stats: {result.rowcount} rows')
@@ -0,0 +1,79 @@
+from datetime import datetime
+from sqlalchemy import select
+from models import db, Assignment, Lesson, student_lessons
+
+PAGE_SIZE = 50
+
+
+# (name, statement, indexes) for the dashboard, list and enrollment queries the lookup indexes
+# (migration 3f9a1c2b7d4e) were added for, shaped like the routes that run them. The first index is
+# the one meant for the query; the others are also fine, e.g. SQLite has no statistics to prefer
+# a partial index over a plain one on the same column.
+def _cases(student_id, instructor_id, lesson_id, now):
+    return (
+        ('student dashboard, own assignments',
+         select(Assignment).where(Assignment.student_id == student_id).order_by(Assignment.id),
+         ('ix_assignment_student_id',)),
+        ('student dashboard, open assignments',
+         select(Assignment).where(Assignment.student_id.is_(None)).order_by(Assignment.id),
+         ('ix_assignment_unassigned', 'ix_assignment_student_id')),
+        ('instructor dashboard page',
+         select(Assignment).where(Assignment.instructor_id == instructor_id).order_by(Assignment.id).limit(PAGE_SIZE),
+         ('ix_assignment_instructor_id_id',)),
+        ('assignments by status page',
+         select(Assignment).where(Assignment.status == 'graded').order_by(Assignment.id).limit(PAGE_SIZE),
+         ('ix_assignment_status_id',)),
+        ('overdue sweep batch',
+         select(Assignment.id).where(Assignment.status == 'pending', Assignment.due_date < now,
+                                     Assignment.student_id.isnot(None))
+         .order_by(Assignment.due_date).limit(1000),
+         ('ix_assignment_pending_due_date', 'ix_assignment_status_id')),
+        ('instructor lessons page',
+         select(Lesson).where(Lesson.instructor_id == instructor_id).order_by(Lesson.id).limit(PAGE_SIZE),
+         ('ix_lesson_instructor_id_id',)),
+        ('lesson roster',
+         select(student_lessons.c.student_id).where(student_lessons.c.lesson_id == lesson_id),
+         ('ix_student_lessons_lesson_id_student_id',))
+    )
+
+
+def _explain(connection, statement):
+    sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True}))
+    prefix = 'EXPLAIN' if connection.dialect.name == 'postgresql' else 'EXPLAIN QUERY PLAN'
+    rows = connection.exec_driver_sql(f'{prefix} {sql}').all()
+    # Postgres returns one line per row, SQLite (id, parent, notused, detail) rows
+    return '\n'.join(str(row[-1]) for row in rows)
+
+
+# Runs EXPLAIN for each case against the current (seeded) database and reports which of its
+# indexes the plan reads, None for a plan that reads none of them. Postgres plans depend on table
+# statistics, so its tables are analyzed first; on a near-empty database the planner may rightly
+# prefer a sequential scan.
+def run(analyze=True):
+    with db.engine.connect() as connection:
+        student_id = connection.scalar(
+            select(Assignment.student_id).where(Assignment.student_id.isnot(None)).limit(1))
+        instructor_id = connection.scalar(select(Assignment.instructor_id).limit(1))
+        lesson_id = connection.scalar(select(student_lessons.c.lesson_id).limit(1))
+        if student_id is None or instructor_id is None or lesson_id is None:
+            raise RuntimeError('No assignments or enrollments to explain, run `flask bench seed` first')
+
+        if analyze and connection.dialect.name == 'postgresql':
+            for table in ('assignment', 'lesson', 'student_lessons'):
+                connection.exec_driver_sql(f'ANALYZE {table}')
+
+        results = []
+        for name, statement, indexes in _cases(student_id, instructor_id, lesson_id, datetime.utcnow()):
+            plan = _explain(connection, statement)
+            used = next((index for index in indexes if index in plan), None)
+            results.append({'case': name, 'expected': indexes[0], 'index': used, 'plan': plan})
+    return results
+
+
+def format_report(results, verbose=False):
+    lines = []
+    for r in results:
+        lines.append(f'{"ok" if r["index"] else "MISSING":<9}{r["case"]:<38}{r["index"] or r["expected"]}')
+        if verbose or not r['index']:
+            lines.extend(f'    {line}' for line in r['plan'].splitlines())
+    return '\n'.join(lines)
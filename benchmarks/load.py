@@ -0,0 +1,276 @@
+import http.client
+import json
+import random
+import threading
+import time
+import uuid
+from urllib.parse import urlsplit
+from benchmarks.datagen import BENCH_PASSWORD, bench_username
+
+ADMIN_CREDENTIALS = ('ADM-001', 'Admin@123')
+
+
+# one keep-alive connection per worker thread, reopened whenever the server closes it
+class Client:
+    def __init__(self, base_url, timeout=30):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port
+        self.https = parts.scheme == 'https'
+        self.timeout = timeout
+        self.connection = None
+
+    def _connect(self):
+        connection_class = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        self.connection = connection_class(self.host, self.port, timeout=self.timeout)
+
+    def request(self, method, path, body=None, token=None, content_type='application/json'):
+        headers = {}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        if body is not None:
+            headers['Content-Type'] = content_type
+            if content_type == 'application/json':
+                body = json.dumps(body)
+
+        for attempt in range(2):
+            if self.connection is None:
+                self._connect()
+            try:
+                self.connection.request(method, path, body=body, headers=headers)
+                response = self.connection.getresponse()
+                data = response.read()
+            except (http.client.HTTPException, OSError):
+                self.connection.close()
+                self.connection = None
+                if attempt:
+                    raise
+                continue
+            if response.getheader('Connection', '').lower() == 'close':
+                self.connection.close()
+                self.connection = None
+            return response.status, data
+
+    def json(self, method, path, body=None, token=None):
+        status, data = self.request(method, path, body, token)
+        return status, json.loads(data) if data else None
+
+
+# logged-in identities and the ids the scenarios need, resolved once per worker before timing starts
+class WorkerState:
+    def __init__(self, client, worker, instructors, students):
+        self.client = client
+        self.rng = random.Random(worker)
+        self.student_username = bench_username('STUDENT', worker % students)
+        self.admin_token = self.login(*ADMIN_CREDENTIALS)
+        self.instructor_token = self.login(bench_username('INSTRUCTOR', worker % instructors), BENCH_PASSWORD)
+        self.student_token = self.login(self.student_username, BENCH_PASSWORD)
+
+        _, lessons = client.json('GET', '/api/instructor/lessons?limit=200', token=self.instructor_token)
+        _, assignments = client.json('GET', '/api/instructor/dashboard?limit=200', token=self.instructor_token)
+        _, dashboard = client.json('GET', '/api/student/dashboard', token=self.student_token)
+        _, enrolled = client.json('GET', '/api/student/lessons', token=self.student_token)
+        self.lesson_ids = [lesson['id'] for lesson in lessons['data']]
+        self.assignment_ids = [assignment['id'] for assignment in assignments['data']]
+        self.student_assignment_ids = [assignment['id'] for assignment in dashboard['data']['assignments']]
+        self.enrolled_lesson_ids = [lesson['id'] for lesson in enrolled['data']]
+        self.student_id = self.whoami(self.student_token)
+
+        self.submission_ids = []
+        for assignment_id in self.assignment_ids[:20]:
+            _, submissions = client.json('GET', f'/api/instructor/assignment/{assignment_id}/submissions',
+                                         token=self.instructor_token)
+            self.submission_ids.extend(submission['id'] for submission in submissions['data'])
+
+    def login(self, username, password):
+        status, body = self.client.json('POST', '/api/auth/login', {'username': username, 'password': password})
+        if status != 200:
+            raise RuntimeError(f'Login failed for {username}: {status} {body}')
+        return body['data']['token']
+
+    def whoami(self, token):
+        _, body = self.client.json('GET', '/api/auth/verify', token=token)
+        return body['data']['user']['id']
+
+    def pick(self, ids):
+        return self.rng.choice(ids) if ids else 0
+
+    def new_user(self):
+        _, body = self.client.json('POST', '/api/admin/users', {
+            'username': f'BENCH-TMP-{uuid.uuid4().hex[:12]}',
+            'password': BENCH_PASSWORD,
+            'role': 'STUDENT'
+        }, token=self.admin_token)
+        return body['data']['id']
+
+
+# (name, method, weight, request builder). Builders return (path, body, token[, content_type]);
+# weights roughly follow production traffic, reads dominate.
+def _scenarios():
+    def grade_body(state):
+        return {'grades': [{'id': i, 'grade': state.rng.randint(40, 100)} for i in state.submission_ids[:20]]}
+
+    def bulk_users_body(state):
+        rows = [f'BENCH-IMP-{uuid.uuid4().hex[:12]},{BENCH_PASSWORD},STUDENT' for _ in range(10)]
+        return 'username,password,role\n' + '\n'.join(rows) + '\n'
+
+    return [
+        ('auth.login', 'POST', 2, lambda s: ('/api/auth/login', {'username': s.student_username, 'password': BENCH_PASSWORD}, None)),
+        ('auth.verify', 'GET', 10, lambda s: ('/api/auth/verify', None, s.student_token)),
+        # logs out a fresh token so the worker's own session stays valid
+        ('auth.logout', 'POST', 1, lambda s: ('/api/auth/logout', None, s.login(s.student_username, BENCH_PASSWORD))),
+        ('auth.reset_password', 'POST', 1, lambda s: ('/api/auth/reset-password', {'old_password': BENCH_PASSWORD, 'new_password': BENCH_PASSWORD}, s.student_token)),
+
+        ('admin.get_users', 'GET', 3, lambda s: ('/api/admin/users', None, s.admin_token)),
+        ('admin.get_assignments', 'GET', 3, lambda s: ('/api/admin/assignments?include=instructor', None, s.admin_token)),
+        ('admin.get_lessons', 'GET', 3, lambda s: ('/api/admin/lessons', None, s.admin_token)),
+        ('admin.create_user', 'POST', 1, lambda s: ('/api/admin/users', {'username': f'BENCH-TMP-{uuid.uuid4().hex[:12]}', 'password': BENCH_PASSWORD, 'role': 'STUDENT'}, s.admin_token)),
+        ('admin.bulk_create_users', 'POST', 1, lambda s: ('/api/admin/users/bulk', bulk_users_body(s), s.admin_token, 'text/csv')),
+        ('admin.update_user', 'PUT', 1, lambda s: (f'/api/admin/users/{s.new_user()}', {'role': 'INSTRUCTOR'}, s.admin_token)),
+        ('admin.delete_user', 'DELETE', 1, lambda s: (f'/api/admin/users/{s.new_user()}', None, s.admin_token)),
+        ('admin.enroll', 'POST', 1, lambda s: (f'/api/admin/lesson/{s.pick(s.lesson_ids)}/students', {'student_ids': [s.student_id]}, s.admin_token)),
+        ('admin.unenroll', 'DELETE', 1, lambda s: (f'/api/admin/lesson/{s.pick(s.lesson_ids)}/students', {'student_ids': [s.student_id]}, s.admin_token)),
+        ('admin.db_pool_metrics', 'GET', 1, lambda s: ('/api/admin/metrics/db-pool', None, s.admin_token)),
+        ('admin.request_timing_metrics', 'GET', 1, lambda s: ('/api/admin/metrics/requests', None, s.admin_token)),
+
+        ('instructor.dashboard', 'GET', 10, lambda s: ('/api/instructor/dashboard', None, s.instructor_token)),
+        ('instructor.get_lessons', 'GET', 5, lambda s: ('/api/instructor/lessons', None, s.instructor_token)),
+        ('instructor.get_lesson', 'GET', 3, lambda s: (f'/api/instructor/lesson/{s.pick(s.lesson_ids)}', None, s.instructor_token)),
+        ('instructor.get_assignment', 'GET', 3, lambda s: (f'/api/instructor/assignment/{s.pick(s.assignment_ids)}', None, s.instructor_token)),
+        ('instructor.get_submissions', 'GET', 3, lambda s: (f'/api/instructor/assignment/{s.pick(s.assignment_ids)}/submissions', None, s.instructor_token)),
+        ('instructor.create_lesson', 'POST', 1, lambda s: ('/api/instructor/lesson', {'title': 'Bench lesson', 'content': 'Bench content ' * 50, 'description': 'Bench'}, s.instructor_token)),
+        ('instructor.create_assignment', 'POST', 1, lambda s: ('/api/instructor/assignment', {'title': 'Bench assignment', 'description': 'Bench instructions', 'due_date': '2026-12-31T00:00:00'}, s.instructor_token)),
+        ('instructor.grade_assignment', 'PUT', 1, lambda s: (f'/api/instructor/assignment/{s.pick(s.assignment_ids)}/grade', {'grade': s.rng.randint(40, 100)}, s.instructor_token)),
+        ('instructor.bulk_grade_submissions', 'PUT', 1, lambda s: ('/api/instructor/submissions/grade', grade_body(s), s.instructor_token)),
+        ('instructor.enroll', 'POST', 1, lambda s: (f'/api/instructor/lesson/{s.pick(s.lesson_ids)}/students', {'student_ids': [s.student_id]}, s.instructor_token)),
+        ('instructor.unenroll', 'DELETE', 1, lambda s: (f'/api/instructor/lesson/{s.pick(s.lesson_ids)}/students', {'student_ids': [s.student_id]}, s.instructor_token)),
+
+        ('student.dashboard', 'GET', 20, lambda s: ('/api/student/dashboard', None, s.student_token)),
+        ('student.view_lessons', 'GET', 10, lambda s: ('/api/student/lessons', None, s.student_token)),
+        ('student.view_lesson', 'GET', 5, lambda s: (f'/api/student/lesson/{s.pick(s.enrolled_lesson_ids)}', None, s.student_token)),
+        ('student.view_assignment', 'GET', 5, lambda s: (f'/api/student/assignment/{s.pick(s.student_assignment_ids)}', None, s.student_token)),
+        ('student.my_assignments', 'GET', 5, lambda s: ('/api/student/my-assignments', None, s.student_token)),
+        ('student.my_submissions', 'GET', 5, lambda s: ('/api/student/my-submissions', None, s.student_token)),
+        ('student.submit_assignment', 'POST', 2, lambda s: (f'/api/student/assignment/{s.pick(s.student_assignment_ids)}/submit', {'submission': 'Bench answer'}, s.student_token)),
+        ('student.enroll_lesson', 'POST', 1, lambda s: (f'/api/student/lesson/{s.pick(s.lesson_ids)}/enroll', None, s.student_token))
+    ]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+# Drives every route from `concurrency` threads for `duration` seconds and returns per-route
+# latencies. Setup requests (logins, id discovery, users created for update/delete) are not timed.
+def run(base_url, concurrency=16, duration=30, instructors=100, students=10000, routes=None,
+        read_only=False, seed=0):
+    scenarios = _scenarios()
+    if read_only:
+        scenarios = [scenario for scenario in scenarios if scenario[1] == 'GET']
+    if routes:
+        scenarios = [scenario for scenario in scenarios if any(pattern in scenario[0] for pattern in routes)]
+    if not scenarios:
+        raise ValueError('No routes match the given filters')
+
+    results = {name: {'latencies': [], 'errors': 0} for name, _, _, _ in scenarios}
+    results_lock = threading.Lock()
+    clock = {}
+
+    # runs once every worker is set up, before any of them is released
+    def start_clock():
+        clock['started'] = time.perf_counter()
+        clock['deadline'] = clock['started'] + duration
+
+    ready = threading.Barrier(concurrency + 1, action=start_clock)
+    failures = []
+
+    def worker(index):
+        client = Client(base_url)
+        try:
+            state = WorkerState(client, seed + index, instructors, students)
+        except Exception as e:
+            failures.append(e)
+            ready.abort()
+            return
+        ready.wait()
+
+        names = [name for name, _, _, _ in scenarios]
+        weights = [weight for _, _, weight, _ in scenarios]
+        requests = {name: (method, builder) for name, method, _, builder in scenarios}
+        local = {name: ([], 0) for name in names}
+        while time.perf_counter() < clock['deadline']:
+            name = state.rng.choices(names, weights)[0]
+            method, builder = requests[name]
+            try:
+                path, body, token, *content_type = builder(state)
+            except Exception:
+                continue
+            start = time.perf_counter()
+            try:
+                status, _ = client.request(method, path, body, token, *content_type)
+                failed = status >= 500
+            except (http.client.HTTPException, OSError):
+                failed = True
+            latencies, errors = local[name]
+            latencies.append(time.perf_counter() - start)
+            local[name] = (latencies, errors + failed)
+
+        with results_lock:
+            for name, (latencies, errors) in local.items():
+                results[name]['latencies'].extend(latencies)
+                results[name]['errors'] += errors
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    try:
+        ready.wait()
+    except threading.BrokenBarrierError:
+        raise RuntimeError(f'Worker setup failed: {failures[0] if failures else "unknown error"}')
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - clock['started']
+
+    return summarize(results, elapsed)
+
+
+def summarize(results, elapsed):
+    rows = []
+    everything = []
+    total_errors = 0
+    for name, result in sorted(results.items()):
+        latencies = sorted(result['latencies'])
+        if not latencies:
+            continue
+        everything.extend(latencies)
+        total_errors += result['errors']
+        rows.append(_row(name, latencies, result['errors'], elapsed))
+    everything.sort()
+    return {'elapsed': elapsed, 'routes': rows, 'total': _row('TOTAL', everything, total_errors, elapsed)}
+
+
+def _row(name, latencies, errors, elapsed):
+    return {
+        'route': name,
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000
+    }
+
+
+def format_report(report):
+    header = f'{"route":<36} {"requests":>9} {"errors":>7} {"req/s":>9} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9}'
+    lines = [header, '-' * len(header)]
+    for row in report['routes'] + [report['total']]:
+        lines.append(
+            f'{row["route"]:<36} {row["requests"]:>9} {row["errors"]:>7} {row["rps"]:>9.1f} '
+            f'{row["p50_ms"]:>9.2f} {row["p95_ms"]:>9.2f} {row["p99_ms"]:>9.2f}'
+        )
+    lines.append(f'elapsed {report["elapsed"]:.1f}s')
+    return '\n'.join(lines)
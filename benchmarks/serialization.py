@@ -0,0 +1,134 @@
+import time
+from datetime import datetime, timedelta
+from flask.json.provider import DefaultJSONProvider
+from marshmallow.fields import Nested
+from models import User, Assignment, Lesson
+from schemas import assignments_schema, assignments_summary_schema, lessons_schema, lessons_summary_schema, users_summary_schema
+from utils.json_provider import FastJSONProvider
+
+BASE_DATE = datetime(2026, 1, 1)
+
+# (name, schema, rows key); the full schemas dump nested users as well
+CASES = (
+    ('users summary', users_summary_schema, 'users'),
+    ('assignments summary', assignments_summary_schema, 'assignments'),
+    ('assignments full', assignments_schema, 'assignments'),
+    ('lessons summary', lessons_summary_schema, 'lessons'),
+    ('lessons full', lessons_schema, 'lessons')
+)
+
+
+# transient model instances shaped like list endpoint results, nothing touches the database
+def build_rows(count, students_per_lesson=20):
+    users = []
+    for n in range(count):
+        user = User(username=f'BENCH-STU-{n:07d}', password='x', role='STUDENT')
+        user.id = n + 2
+        users.append(user)
+    instructor = User(username='BENCH-INS-0000000', password='x', role='INSTRUCTOR')
+    instructor.id = 1
+
+    assignments = []
+    lessons = []
+    for n in range(count):
+        assignment = Assignment(f'Assignment {n}', f'Assignment {n} instructions. ' * 20,
+                                BASE_DATE + timedelta(days=n % 365), instructor.id)
+        assignment.id = n + 1
+        assignment.status = 'graded' if n % 3 == 0 else 'pending'
+        assignment.grade = 50 + n % 50 if n % 3 == 0 else None
+        assignment.student_id = users[n].id
+        assignment.submitted_on = BASE_DATE if n % 3 == 0 else None
+        assignment.graded_on = None
+        assignment.updated_on = BASE_DATE
+        assignment.submission = None
+        assignment.instructor = instructor
+        assignment.student = users[n]
+        assignments.append(assignment)
+
+        lesson = Lesson(f'Lesson {n}', f'Lesson {n} content. ' * 200, f'Synthetic lesson {n}',
+                        BASE_DATE + timedelta(days=n % 365), instructor.id)
+        lesson.id = n + 1
+        lesson.updated_on = BASE_DATE
+        lesson.instructor = instructor
+        lesson.students = [users[(n + k) % count] for k in range(min(students_per_lesson, count))]
+        lessons.append(lesson)
+    return {'users': users, 'assignments': assignments, 'lessons': lessons}
+
+
+# a fresh instance of the same variant with the compiled dump functions switched off, nested
+# schemas included, so it runs marshmallow's own serialization
+def marshmallow_schema(schema):
+    reference = type(schema)(only=schema.only, exclude=schema.exclude, many=schema.many)
+    _disable_compiled(reference)
+    return reference
+
+
+def _disable_compiled(schema):
+    schema._dump_one = schema._dump_many = None
+    for field in schema.dump_fields.values():
+        if isinstance(field, Nested):
+            _disable_compiled(field.schema)
+
+
+# mean seconds per call, best of `repeat` rounds of `number` calls
+def _timeit(fn, repeat, number):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = (time.perf_counter() - start) / number
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+# Compares marshmallow + Flask's DefaultJSONProvider with the compiled dumpers + FastJSONProvider on
+# the same rows, after checking that both produce the same bytes.
+def run(app, rows=500, repeat=5, number=20):
+    data = build_rows(rows)
+    default_provider = DefaultJSONProvider(app)
+    fast_provider = FastJSONProvider(app)
+
+    results = []
+    for name, schema, key in CASES:
+        objs = data[key]
+        reference = marshmallow_schema(schema)
+        expected = reference.dump(objs)
+        dumped = schema.dump(objs)
+
+        payload = {'status': 'success', 'data': dumped}
+        default_json = default_provider.dumps({'status': 'success', 'data': expected}, separators=(',', ':'))
+        fast_json = fast_provider.dumps(payload, separators=(',', ':'))
+        if dumped != expected or fast_json != default_json:
+            raise AssertionError(f'{name}: compiled output differs from marshmallow')
+
+        marshmallow_s = _timeit(lambda: reference.dump(objs), repeat, number)
+        compiled_s = _timeit(lambda: schema.dump(objs), repeat, number)
+        default_json_s = _timeit(lambda: default_provider.dumps(payload, separators=(',', ':')), repeat, number)
+        fast_json_s = _timeit(lambda: fast_provider.dumps(payload, separators=(',', ':')), repeat, number)
+        results.append({
+            'case': name,
+            'rows': len(objs),
+            'bytes': len(fast_json),
+            'marshmallow_ms': round(marshmallow_s * 1000, 3),
+            'compiled_ms': round(compiled_s * 1000, 3),
+            'dump_speedup': round(marshmallow_s / compiled_s, 2),
+            'default_json_ms': round(default_json_s * 1000, 3),
+            'fast_json_ms': round(fast_json_s * 1000, 3),
+            'json_speedup': round(default_json_s / fast_json_s, 2),
+            'total_speedup': round((marshmallow_s + default_json_s) / (compiled_s + fast_json_s), 2)
+        })
+    return results
+
+
+def format_report(results):
+    header = f'{"case":<22}{"rows":>6}{"bytes":>10}{"marshmallow":>13}{"compiled":>10}{"x":>7}' \
+             f'{"json":>9}{"fast json":>11}{"x":>7}{"total x":>9}'
+    lines = [header, '-' * len(header)]
+    for r in results:
+        lines.append(
+            f'{r["case"]:<22}{r["rows"]:>6}{r["bytes"]:>10}{r["marshmallow_ms"]:>11.2f}ms'
+            f'{r["compiled_ms"]:>8.2f}ms{r["dump_speedup"]:>7.1f}'
+            f'{r["default_json_ms"]:>7.2f}ms{r["fast_json_ms"]:>9.2f}ms{r["json_speedup"]:>7.1f}{r["total_speedup"]:>9.1f}'
+        )
+    return '\n'.join(lines)
@@ -0,0 +1,77 @@
+import time
+import click
+from flask.cli import with_appcontext
+from werkzeug.security import generate_password_hash
+from models import db, User
+from utils.overdue import sweep_overdue
+
+# default accounts for local development and testing
+SEED_USERS = (
+    ('ADM-001', 'Admin@123', 'ADMIN'),
+    ('INST-001', 'Instructor@123', 'INSTRUCTOR'),
+    ('SFT-001', 'Student@123', 'STUDENT')
+)
+
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    db.create_all()
+    click.echo('Database tables created successfully!')
+
+
+# idempotent: one lookup for all seed usernames, only the missing accounts get hashed and inserted
+@click.command('seed')
+@with_appcontext
+def seed_command():
+    usernames = [username for username, _, _ in SEED_USERS]
+    existing = set(db.session.scalars(db.select(User.username).where(User.username.in_(usernames))))
+
+    created = []
+    for username, password, role in SEED_USERS:
+        if username in existing:
+            continue
+        db.session.add(User(
+            username=username,
+            password=generate_password_hash(password),
+            role=role
+        ))
+        created.append(username)
+    db.session.commit()
+
+    for username in created:
+        click.echo(f'User {username} created successfully!')
+    if not created:
+        click.echo('Seed users already exist')
+
+
+# e.g. from cron every minute, or `flask sweep-overdue --interval 60` as a long-running job
+@click.command('sweep-overdue', help='Mark pending assignments past their due date as overdue.')
+@click.option('--batch-size', default=1000, show_default=True, help='Assignments updated per statement.')
+@click.option('--pause', default=0.05, show_default=True, help='Seconds to wait between batches.')
+@click.option('--interval', default=0.0, show_default=True, help='Repeat every N seconds, 0 runs once.')
+@with_appcontext
+def sweep_overdue_command(batch_size, pause, interval):
+    while True:
+        marked = sweep_overdue(batch_size=batch_size, pause=pause, log=click.echo)
+        click.echo(f'{marked} assignments marked overdue')
+        if interval <= 0:
+            return
+        time.sleep(interval)
+
+
+# The CLI-only commands, registered by create_app when ENABLE_CLI_COMMANDS is set. Commands such
+# as `flask routes` read the URL map, so the lazily registered blueprints are loaded here as well.
+def register_commands(app):
+    from benchmarks.cli import bench_cli
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(seed_command)
+    app.cli.add_command(sweep_overdue_command)
+    app.cli.add_command(bench_cli)
+
+    # flask_migrate pulls in alembic, only needed for the `flask db` commands
+    if app.config.get('ENABLE_MIGRATIONS'):
+        from flask_migrate import Migrate
+        Migrate(app, db)
+
+    app.extensions['lazy_blueprints'].load()
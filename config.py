@@ -1,13 +1,25 @@
 import os
 from datetime import timedelta
 from dotenv import load_dotenv
+from sqlalchemy.engine import make_url
+from utils.pool_metrics import InstrumentedQueuePool
 
 load_dotenv()
 
+
+# Engine options for `uri`: the *_POSTGRES_ENGINE_OPTIONS below (pool sizing, driver-specific
+# statement_timeout) only apply to Postgres, any other database (e.g. SQLite in tests) gets
+# `options` alone. Keys in `options` win over the Postgres defaults.
+def engine_options(uri, postgres_options, options):
+    if uri and make_url(uri).get_backend_name() == 'postgresql':
+        return {**postgres_options, **options}
+    return dict(options)
+
+
 class Config:
     # Flask
     SECRET_KEY = os.getenv('SECRET_KEY')
-    
+
     # PostgreSQL Database Configuration
     DB_CONFIG = {
         "dbname": os.getenv("DB_NAME"),
@@ -20,14 +32,106 @@ class Config:
     # SQLAlchemy with PostgreSQL
     SQLALCHEMY_DATABASE_URI = f"postgresql://{DB_CONFIG['user']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['dbname']}" 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    
+
+    # Connection pool: size it so workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) stays under max_connections.
+    # Pre-ping and recycle drop connections left dead by a failover instead of stalling on them.
+    # create_app applies these on Postgres only, SQLALCHEMY_ENGINE_OPTIONS adds to or overrides them.
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    POSTGRES_ENGINE_OPTIONS = {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes'),
+        # per-statement limit in milliseconds, 0 disables it
+        'connect_args': {'options': f"-c statement_timeout={int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 30000))}"}
+    }
+
     # JWT Configuration
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY')
-    JWT_ACCESS_TOKEN_EXPIRES = False
+    # Finite so revoked tokens and cutoffs can be forgotten once the tokens they reject have expired
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=float(os.getenv('JWT_ACCESS_TOKEN_EXPIRES_HOURS', 12)))
     JWT_HEADER_TYPE = 'Bearer'
     JWT_TOKEN_LOCATION = ['headers']
     JWT_HEADER_NAME = 'Authorization'
     JWT_ERROR_MESSAGE_KEY = 'message'
     JWT_ALGORITHM = "HS256"
 
-    
\ No newline at end of file
+    # Logout revocation. Each worker holds the revoked jtis in memory and reads new ones at most every
+    # TOKEN_DENYLIST_SYNC_SECONDS, the longest a token logged out on another worker keeps working here.
+    # CAPACITY and ERROR_RATE size the Bloom filter in front of the set; it doubles when full.
+    TOKEN_DENYLIST_SYNC_SECONDS = float(os.getenv('TOKEN_DENYLIST_SYNC_SECONDS', 2))
+    TOKEN_DENYLIST_CAPACITY = int(os.getenv('TOKEN_DENYLIST_CAPACITY', 100000))
+    TOKEN_DENYLIST_ERROR_RATE = float(os.getenv('TOKEN_DENYLIST_ERROR_RATE', 0.001))
+    # How often a worker deletes rows older than JWT_ACCESS_TOKEN_EXPIRES and drops them from memory
+    TOKEN_DENYLIST_PRUNE_SECONDS = float(os.getenv('TOKEN_DENYLIST_PRUNE_SECONDS', 3600))
+
+    # Seconds a loaded user row is reused by load_current_user (0 disables the cache)
+    IDENTITY_CACHE_TTL = int(os.getenv('IDENTITY_CACHE_TTL', 30))
+
+    # Worker processes used for password hashing (0 uses one per CPU)
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 0))
+    # Hashes allowed to wait for a login/reset worker before answering 503 (0 uses 4 per worker)
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', 0))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', 10))
+
+    # Rate limits as (requests, window seconds) per route group and key: 'ip' (request.remote_addr, so
+    # put the app behind ProxyFix when a proxy fronts it), 'username' (login body) or 'identity' (JWT).
+    # 'local' counts per process; point RATE_LIMIT_BACKEND at a shared backend class to count across workers.
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'local')
+    RATE_LIMIT_MAX_KEYS = int(os.getenv('RATE_LIMIT_MAX_KEYS', 100000))
+    RATE_LIMITS = {
+        'login': {'ip': (30, 60), 'username': (10, 300)},
+        'reset_password': {'identity': (5, 300), 'ip': (20, 300)},
+        'submit': {'identity': (30, 60)},
+        'create': {'identity': (60, 60)}
+    }
+
+    # Response cache for lesson/assignment reads. 'local' is per process, so other workers only
+    # see invalidations after the TTL; point RESPONSE_CACHE_BACKEND at a shared backend class to avoid that.
+    RESPONSE_CACHE_BACKEND = os.getenv('RESPONSE_CACHE_BACKEND', 'local')
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 60))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 5000))
+
+
+    # In-process overdue sweep every OVERDUE_SWEEP_INTERVAL seconds (0 disables it; `flask sweep-overdue`
+    # from cron does the same job). Batches commit separately with OVERDUE_SWEEP_PAUSE seconds between them.
+    OVERDUE_SWEEP_INTERVAL = float(os.getenv('OVERDUE_SWEEP_INTERVAL', 0))
+    OVERDUE_SWEEP_BATCH_SIZE = int(os.getenv('OVERDUE_SWEEP_BATCH_SIZE', 1000))
+    OVERDUE_SWEEP_PAUSE = float(os.getenv('OVERDUE_SWEEP_PAUSE', 0.05))
+
+    # Provider class behind jsonify; 'flask.json.provider.DefaultJSONProvider' restores Flask's own
+    JSON_PROVIDER = os.getenv('JSON_PROVIDER', 'utils.json_provider.FastJSONProvider')
+
+    # gzip/brotli for JSON and CSV bodies of at least COMPRESSION_MIN_SIZE bytes, negotiated from
+    # Accept-Encoding; brotli is only offered when the brotli package is installed.
+    COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+    COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', 6))
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', 5))
+
+    # Registers the CLI commands (init-db, seed, sweep-overdue, bench) and, with ENABLE_MIGRATIONS, the
+    # `flask db` migration commands. The flask CLI sets FLASK_RUN_FROM_CLI before it imports the app;
+    # WSGI workers leave it unset and skip importing them.
+    ENABLE_CLI_COMMANDS = os.getenv('ENABLE_CLI_COMMANDS', os.getenv('FLASK_RUN_FROM_CLI', 'false')).lower() == 'true'
+    ENABLE_MIGRATIONS = os.getenv('ENABLE_MIGRATIONS', os.getenv('FLASK_RUN_FROM_CLI', 'false')).lower() == 'true'
+
+    # Async read tier (async_app.py). The URI defaults to SQLALCHEMY_DATABASE_URI on the asyncpg driver;
+    # its pool serves concurrent polls from one event loop, so it is sized larger than a sync worker's.
+    ASYNC_SQLALCHEMY_DATABASE_URI = os.getenv('ASYNC_DATABASE_URL')
+    ASYNC_SQLALCHEMY_ENGINE_OPTIONS = {}
+    ASYNC_POSTGRES_ENGINE_OPTIONS = {
+        'pool_size': int(os.getenv('ASYNC_DB_POOL_SIZE', 20)),
+        'max_overflow': int(os.getenv('ASYNC_DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes'),
+        'connect_args': {'server_settings': {'statement_timeout': str(int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 30000)))}}
+    }
+
+    # Per-request timings: Server-Timing headers and /api/admin/metrics/requests. Requests slower than
+    # SLOW_REQUEST_MS are logged with the SQL statements they ran (0 disables the log).
+    REQUEST_METRICS_ENABLED = os.getenv('REQUEST_METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    SLOW_REQUEST_MS = int(os.getenv('SLOW_REQUEST_MS', 500))
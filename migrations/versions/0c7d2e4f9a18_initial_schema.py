@@ -0,0 +1,71 @@
+"""initial schema: user, assignment, lesson and student_lessons
+
+Revision ID: 0c7d2e4f9a18
+Revises: 
+Create Date: 2026-10-18 08:55:02.614390
+
+The tables as the app created them with db.create_all() before migrations existed. A database
+created that way already has them: run `flask db stamp 0c7d2e4f9a18` once, then `flask db upgrade`.
+An empty database just runs `flask db upgrade`.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0c7d2e4f9a18'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('username', sa.String(length=200), nullable=False),
+    sa.Column('password', sa.String(length=500), nullable=False),
+    sa.Column('role', sa.String(length=50), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('username')
+    )
+    op.create_table('assignment',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=100), nullable=False),
+    sa.Column('description', sa.Text(), nullable=False),
+    sa.Column('due_date', sa.DateTime(), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=False),
+    sa.Column('grade', sa.Float(), nullable=True),
+    sa.Column('instructor_id', sa.Integer(), nullable=False),
+    sa.Column('student_id', sa.Integer(), nullable=True),
+    sa.Column('submission', sa.Text(), nullable=True),
+    sa.Column('submitted_on', sa.DateTime(), nullable=True),
+    sa.Column('graded_on', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['instructor_id'], ['user.id'], ),
+    sa.ForeignKeyConstraint(['student_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('lesson',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=100), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('due_date', sa.DateTime(), nullable=True),
+    sa.Column('instructor_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['instructor_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('student_lessons',
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('lesson_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['lesson_id'], ['lesson.id'], ),
+    sa.ForeignKeyConstraint(['student_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('student_id', 'lesson_id')
+    )
+
+
+def downgrade():
+    op.drop_table('student_lessons')
+    op.drop_table('lesson')
+    op.drop_table('assignment')
+    op.drop_table('user')
@@ -0,0 +1,48 @@
+"""add lookup indexes for dashboards and enrollments
+
+Revision ID: 3f9a1c2b7d4e
+Revises: 0c7d2e4f9a18
+Create Date: 2026-10-18 09:12:41.305127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c2b7d4e'
+down_revision = '0c7d2e4f9a18'
+branch_labels = None
+depends_on = None
+
+
+# (name, table, columns, partial index predicate)
+INDEXES = [
+    ('ix_assignment_instructor_id_id', 'assignment', ['instructor_id', 'id'], None),
+    ('ix_assignment_student_id', 'assignment', ['student_id'], None),
+    ('ix_assignment_unassigned', 'assignment', ['id'], 'student_id IS NULL'),
+    ('ix_assignment_status_id', 'assignment', ['status', 'id'], None),
+    ('ix_assignment_due_date', 'assignment', ['due_date'], None),
+    ('ix_assignment_pending_due_date', 'assignment', ['due_date'], "status = 'pending'"),
+    ('ix_lesson_instructor_id_id', 'lesson', ['instructor_id', 'id'], None),
+    ('ix_student_lessons_lesson_id_student_id', 'student_lessons', ['lesson_id', 'student_id'], None),
+]
+
+
+def upgrade():
+    # CONCURRENTLY cannot run inside a transaction, and keeps the tables writable while building
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name, table, columns,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+                sqlite_where=sa.text(where) if where else None
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,35 @@
+"""add content/description length columns for list summaries
+
+Revision ID: 5d8c3e19b6f2
+Revises: c41f07a9e2d3
+Create Date: 2026-10-18 12:47:55.903318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d8c3e19b6f2'
+down_revision = 'c41f07a9e2d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('assignment', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('description_length', sa.Integer(), nullable=False, server_default='0'))
+
+    with op.batch_alter_table('lesson', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_length', sa.Integer(), nullable=False, server_default='0'))
+
+    op.execute('UPDATE assignment SET description_length = LENGTH(description)')
+    op.execute('UPDATE lesson SET content_length = LENGTH(content)')
+
+
+def downgrade():
+    with op.batch_alter_table('lesson', schema=None) as batch_op:
+        batch_op.drop_column('content_length')
+
+    with op.batch_alter_table('assignment', schema=None) as batch_op:
+        batch_op.drop_column('description_length')
@@ -0,0 +1,32 @@
+"""add revoked_token table for logout
+
+Revision ID: 6b1e4a9d3f27
+Revises: a3d6f2b8c915
+Create Date: 2026-10-18 16:03:41.226905
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6b1e4a9d3f27'
+down_revision = 'a3d6f2b8c915'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('revoked_token',
+    sa.Column('jti', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('revoked_on', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('jti')
+    )
+    op.create_index('ix_revoked_token_revoked_on', 'revoked_token', ['revoked_on'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_revoked_token_revoked_on', table_name='revoked_token')
+    op.drop_table('revoked_token')
@@ -0,0 +1,53 @@
+"""add per-student submission table
+
+Revision ID: 8b2e5d71c0a4
+Revises: 3f9a1c2b7d4e
+Create Date: 2026-10-18 10:04:17.582913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e5d71c0a4'
+down_revision = '3f9a1c2b7d4e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('submission',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('assignment_id', sa.Integer(), nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('grade', sa.Float(), nullable=True),
+        sa.Column('submitted_on', sa.DateTime(), nullable=False),
+        sa.Column('updated_on', sa.DateTime(), nullable=False),
+        sa.Column('graded_on', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['assignment_id'], ['assignment.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['student_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('assignment_id', 'student_id', name='uq_submission_assignment_id_student_id')
+    )
+    op.create_index('ix_submission_student_id', 'submission', ['student_id'], unique=False)
+
+    # carry over submissions stored on the assignment row itself
+    op.execute("""
+        INSERT INTO submission (assignment_id, student_id, body, status, grade, submitted_on, updated_on, graded_on)
+        SELECT id, student_id, submission,
+               CASE WHEN status = 'graded' THEN 'graded' ELSE 'submitted' END,
+               grade,
+               COALESCE(submitted_on, CURRENT_TIMESTAMP),
+               COALESCE(submitted_on, CURRENT_TIMESTAMP),
+               graded_on
+        FROM assignment
+        WHERE student_id IS NOT NULL AND submission IS NOT NULL
+    """)
+
+
+def downgrade():
+    op.drop_index('ix_submission_student_id', table_name='submission')
+    op.drop_table('submission')
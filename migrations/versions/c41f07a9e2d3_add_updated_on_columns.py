@@ -0,0 +1,32 @@
+"""add updated_on row versions to assignment and lesson
+
+Revision ID: c41f07a9e2d3
+Revises: 8b2e5d71c0a4
+Create Date: 2026-10-18 11:38:02.114560
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41f07a9e2d3'
+down_revision = '8b2e5d71c0a4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('assignment', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_on', sa.DateTime(), nullable=False, server_default=sa.func.now()))
+
+    with op.batch_alter_table('lesson', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_on', sa.DateTime(), nullable=False, server_default=sa.func.now()))
+
+
+def downgrade():
+    with op.batch_alter_table('lesson', schema=None) as batch_op:
+        batch_op.drop_column('updated_on')
+
+    with op.batch_alter_table('assignment', schema=None) as batch_op:
+        batch_op.drop_column('updated_on')
@@ -0,0 +1,40 @@
+"""add seconds_late to submission
+
+Revision ID: d52f8b3e6a10
+Revises: 6b1e4a9d3f27
+Create Date: 2026-10-18 17:26:14.580231
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd52f8b3e6a10'
+down_revision = '6b1e4a9d3f27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('submission', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('seconds_late', sa.Float(), nullable=False, server_default='0'))
+
+    if op.get_bind().dialect.name == 'postgresql':
+        lateness = 'EXTRACT(EPOCH FROM submission.submitted_on - assignment.due_date)'
+    else:
+        lateness = '(julianday(submission.submitted_on) - julianday(assignment.due_date)) * 86400'
+    op.execute(f'''
+        UPDATE submission SET seconds_late = (
+            SELECT {lateness} FROM assignment WHERE assignment.id = submission.assignment_id
+        )
+        WHERE EXISTS (
+            SELECT 1 FROM assignment
+            WHERE assignment.id = submission.assignment_id AND submission.submitted_on > assignment.due_date
+        )
+    ''')
+
+
+def downgrade():
+    with op.batch_alter_table('submission', schema=None) as batch_op:
+        batch_op.drop_column('seconds_late')
@@ -0,0 +1,46 @@
+"""add generated tsvector columns and GIN indexes for full-text search
+
+Revision ID: e7a2c9d14b60
+Revises: 5d8c3e19b6f2
+Create Date: 2026-10-18 14:02:31.417206
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a2c9d14b60'
+down_revision = '5d8c3e19b6f2'
+branch_labels = None
+depends_on = None
+
+SEARCH_VECTORS = {
+    'lesson': "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+              "setweight(to_tsvector('english', coalesce(description, '')), 'B') || "
+              "setweight(to_tsvector('english', coalesce(content, '')), 'C')",
+    'assignment': "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+                  "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+}
+
+
+def upgrade():
+    # tsvector and generated columns are Postgres only, other databases search in process
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    for table, expression in SEARCH_VECTORS.items():
+        op.execute(
+            f'ALTER TABLE {table} ADD COLUMN search_vector tsvector '
+            f'GENERATED ALWAYS AS ({expression}) STORED'
+        )
+        op.create_index(f'ix_{table}_search_vector', table, ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    for table in reversed(list(SEARCH_VECTORS)):
+        op.drop_index(f'ix_{table}_search_vector', table_name=table, postgresql_using='gin')
+        op.execute(f'ALTER TABLE {table} DROP COLUMN search_vector')
@@ -0,0 +1,30 @@
+"""add user_token_cutoff table for revoking a user's tokens
+
+Revision ID: f3c8a1d07e52
+Revises: d52f8b3e6a10
+Create Date: 2026-10-18 19:12:07.418263
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c8a1d07e52'
+down_revision = 'd52f8b3e6a10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_token_cutoff',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('not_before', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_index('ix_user_token_cutoff_not_before', 'user_token_cutoff', ['not_before'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_user_token_cutoff_not_before', table_name='user_token_cutoff')
+    op.drop_table('user_token_cutoff')
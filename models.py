@@ -1,4 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import DDL, delete, event, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import validates
 from datetime import datetime
 
 db = SQLAlchemy()
@@ -6,7 +9,9 @@ db = SQLAlchemy()
 # Association table for many-to-many relationship (Student-Lesson)
 student_lessons = db.Table('student_lessons',
     db.Column('student_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
-    db.Column('lesson_id', db.Integer, db.ForeignKey('lesson.id'), primary_key=True)
+    db.Column('lesson_id', db.Integer, db.ForeignKey('lesson.id'), primary_key=True),
+    # the primary key serves student -> lessons, this serves lesson -> roster lookups
+    db.Index('ix_student_lessons_lesson_id_student_id', 'lesson_id', 'student_id')
 )
 
 # User model
@@ -44,10 +49,29 @@ class User(db.Model):
 
 # Assignment model
 class Assignment(db.Model):
+    __table_args__ = (
+        db.Index('ix_assignment_instructor_id_id', 'instructor_id', 'id'),
+        db.Index('ix_assignment_student_id', 'student_id'),
+        # open assignments (no student yet) listed on every student dashboard
+        db.Index('ix_assignment_unassigned', 'id',
+                 postgresql_where=db.text('student_id IS NULL'),
+                 sqlite_where=db.text('student_id IS NULL')),
+        db.Index('ix_assignment_status_id', 'status', 'id'),
+        db.Index('ix_assignment_due_date', 'due_date'),
+        db.Index('ix_assignment_pending_due_date', 'due_date',
+                 postgresql_where=db.text("status = 'pending'"),
+                 sqlite_where=db.text("status = 'pending'")),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=False)
+    # kept in sync with description so lists can report its size without loading it
+    description_length = db.Column(db.Integer, nullable=False, default=0)
     due_date = db.Column(db.DateTime, nullable=False)
+    # pending, graded or overdue. The overdue sweep (utils/overdue.py) marks an assignment given to
+    # one student 'overdue' once it is past due without their submission; a late submit moves it
+    # back to 'pending' (see Submission.seconds_late)
     status = db.Column(db.String(50), nullable=False, default='pending')
     grade = db.Column(db.Float, nullable=True)
     
@@ -59,9 +83,12 @@ class Assignment(db.Model):
     student = db.relationship('User', back_populates='student_assignments', 
                             foreign_keys=[student_id])
 
+    # single-submission columns from before per-student submissions, kept for existing rows
     submission = db.Column(db.Text, nullable=True)
     submitted_on = db.Column(db.DateTime, nullable=True)
     graded_on = db.Column(db.DateTime, nullable=True)
+    # row version for ETags, bumped on every UPDATE
+    updated_on = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def __init__(self, title, description, due_date, instructor_id):
         self.title = title
@@ -70,11 +97,10 @@ class Assignment(db.Model):
         self.instructor_id = instructor_id
         self.status = 'pending'
 
-    def submit(self, student_id, submission):
-        self.student_id = student_id
-        self.submission = submission
-        self.submitted_on = datetime.utcnow()
-        self.status = 'submitted'
+    @validates('description')
+    def _track_description_length(self, key, value):
+        self.description_length = len(value or '')
+        return value
 
     def grade_assignment(self, grade):
         self.grade = grade
@@ -84,13 +110,176 @@ class Assignment(db.Model):
     def __repr__(self):
         return f'<Assignment {self.title}>'
 
+# Submission model: one row per student per assignment
+class Submission(db.Model):
+    __table_args__ = (
+        db.UniqueConstraint('assignment_id', 'student_id', name='uq_submission_assignment_id_student_id'),
+        db.Index('ix_submission_student_id', 'student_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    # deleting a user or an assignment takes its submissions along (delete_user takes them out of
+    # assignment_stats first)
+    assignment_id = db.Column(db.Integer, db.ForeignKey('assignment.id', ondelete='CASCADE'), nullable=False)
+    student_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(50), nullable=False, default='submitted')
+    grade = db.Column(db.Float, nullable=True)
+    submitted_on = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # seconds past the assignment's due date at the first submission, 0 when on time
+    seconds_late = db.Column(db.Float, nullable=False, default=0.0)
+    updated_on = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    graded_on = db.Column(db.DateTime, nullable=True)
+
+    assignment = db.relationship('Assignment', foreign_keys=[assignment_id])
+    student = db.relationship('User', foreign_keys=[student_id])
+
+    def __init__(self, assignment_id, student_id, body):
+        self.assignment_id = assignment_id
+        self.student_id = student_id
+        self.body = body
+        self.status = 'submitted'
+        self.submitted_on = datetime.utcnow()
+        self.updated_on = self.submitted_on
+
+    # a resubmission replaces the body and clears any earlier grade
+    def resubmit(self, body):
+        self.body = body
+        self.updated_on = datetime.utcnow()
+        self.status = 'submitted'
+        self.grade = None
+        self.graded_on = None
+
+    def __repr__(self):
+        return f'<Submission {self.assignment_id}:{self.student_id}>'
+
+# Running per-assignment gradebook totals, written in the same transaction as the submission
+# changes they summarize so analytics never scan submissions for counts and means. Callers pass
+# deltas and apply() folds them in with one upsert, so concurrent writers add up instead of
+# overwriting each other.
+class AssignmentStats(db.Model):
+    __tablename__ = 'assignment_stats'
+    __table_args__ = (
+        db.Index('ix_assignment_stats_instructor_id_assignment_id', 'instructor_id', 'assignment_id'),
+    )
+
+    COUNTERS = ('submitted_count', 'graded_count', 'grade_sum', 'late_count', 'lateness_sum')
+
+    assignment_id = db.Column(db.Integer, db.ForeignKey('assignment.id', ondelete='CASCADE'), primary_key=True)
+    instructor_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    submitted_count = db.Column(db.Integer, nullable=False, default=0)
+    graded_count = db.Column(db.Integer, nullable=False, default=0)
+    grade_sum = db.Column(db.Float, nullable=False, default=0.0)
+    late_count = db.Column(db.Integer, nullable=False, default=0)
+    # seconds past the due date, summed over late submissions
+    lateness_sum = db.Column(db.Float, nullable=False, default=0.0)
+    updated_on = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # deltas: {(assignment_id, instructor_id): {counter: change}}
+    @staticmethod
+    def apply(deltas):
+        rows = [
+            dict({counter: changes.get(counter, 0) for counter in AssignmentStats.COUNTERS},
+                 assignment_id=assignment_id, instructor_id=instructor_id, updated_on=datetime.utcnow())
+            for (assignment_id, instructor_id), changes in deltas.items()
+            if any(changes.values())
+        ]
+        if not rows:
+            return
+        dialect = postgresql if db.session.get_bind().dialect.name == 'postgresql' else sqlite
+        statement = dialect.insert(AssignmentStats)
+        table = AssignmentStats.__table__
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=[table.c.assignment_id],
+            set_=dict(
+                {counter: table.c[counter] + statement.excluded[counter] for counter in AssignmentStats.COUNTERS},
+                updated_on=statement.excluded.updated_on
+            )
+        ), rows)
+
+    # the changes one submission going from `before` to `after` makes; each side is None (no row)
+    # or a (status, grade) pair, `seconds_late` applies to a new or a removed submission
+    @staticmethod
+    def submission_delta(before, after, seconds_late=0):
+        changes = {}
+        for side, sign in ((before, -1), (after, 1)):
+            if side is None:
+                continue
+            status, grade = side
+            if status == 'graded' and grade is not None:
+                changes['graded_count'] = changes.get('graded_count', 0) + sign
+                changes['grade_sum'] = changes.get('grade_sum', 0.0) + sign * grade
+        if (before is None) != (after is None):
+            sign = 1 if before is None else -1
+            changes['submitted_count'] = sign
+            if seconds_late > 0:
+                changes['late_count'] = sign
+                changes['lateness_sum'] = sign * seconds_late
+        return changes
+
+    @staticmethod
+    def seconds_late(submitted_on, due_date):
+        seconds = (submitted_on - due_date).total_seconds() if submitted_on and due_date else 0
+        return max(seconds, 0)
+
+# Access tokens revoked by logout, keyed by their jti claim. utils.revocation keeps the jtis in
+# memory and reads new rows by revoked_on, so the per-request check never queries this table; rows
+# older than JWT_ACCESS_TOKEN_EXPIRES only reject expired tokens and are pruned.
+class RevokedToken(db.Model):
+    __tablename__ = 'revoked_token'
+    __table_args__ = (
+        db.Index('ix_revoked_token_revoked_on', 'revoked_on'),
+    )
+
+    jti = db.Column(db.String(36), primary_key=True)
+    # a deleted user's rows go with it, the user's tokens stay rejected through UserTokenCutoff
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    revoked_on = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    # idempotent, revoking a token twice keeps the first row
+    @staticmethod
+    def revoke(jti, user_id):
+        dialect = postgresql if db.session.get_bind().dialect.name == 'postgresql' else sqlite
+        db.session.execute(dialect.insert(RevokedToken).values(
+            jti=jti, user_id=user_id, revoked_on=datetime.utcnow()
+        ).on_conflict_do_nothing(index_elements=['jti']))
+
+# Per-user cutoff for access tokens: tokens issued before not_before are rejected. Written
+# when a user's role changes or the user is deleted, since tokens carry the role until they expire.
+# No foreign key, the cutoff has to outlive a deleted user (until TokenDenylist prunes it).
+class UserTokenCutoff(db.Model):
+    __tablename__ = 'user_token_cutoff'
+    __table_args__ = (
+        db.Index('ix_user_token_cutoff_not_before', 'not_before'),
+    )
+
+    user_id = db.Column(db.Integer, primary_key=True)
+    not_before = db.Column(db.DateTime, nullable=False)
+
+    @staticmethod
+    def cut_off(user_id, not_before):
+        dialect = postgresql if db.session.get_bind().dialect.name == 'postgresql' else sqlite
+        statement = dialect.insert(UserTokenCutoff).values(user_id=user_id, not_before=not_before)
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=['user_id'],
+            set_={'not_before': statement.excluded.not_before}
+        ))
+
 # Lesson Model
 class Lesson(db.Model):
+    __table_args__ = (
+        db.Index('ix_lesson_instructor_id_id', 'instructor_id', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     content = db.Column(db.Text, nullable=False)
+    # kept in sync with content so lists can report its size without loading it
+    content_length = db.Column(db.Integer, nullable=False, default=0)
     description = db.Column(db.Text, nullable=True)
     due_date = db.Column(db.DateTime, nullable=True)
+    # row version for ETags, bumped on every UPDATE
+    updated_on = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     instructor_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     instructor = db.relationship('User', back_populates='lessons', foreign_keys=[instructor_id])
@@ -103,13 +292,55 @@ class Lesson(db.Model):
         self.due_date = due_date
         self.instructor_id = instructor_id
 
-    def add_student(self, student):
-        if not self.students.filter_by(id=student.id).first():
-            self.students.append(student)
+    @validates('content')
+    def _track_content_length(self, key, value):
+        self.content_length = len(value or '')
+        return value
 
-    def remove_student(self, student):
-        if self.students.filter_by(id=student.id).first():
-            self.students.remove(student)
+    # Enrollment works on student_lessons directly: one INSERT ... SELECT ... ON CONFLICT DO NOTHING
+    # per call, never loading the roster. Ids that are not students are ignored; the ids actually
+    # added are returned, so repeating a call is harmless.
+    @staticmethod
+    def enroll_students(lesson_id, student_ids):
+        dialect = postgresql if db.session.get_bind().dialect.name == 'postgresql' else sqlite
+        students = select(User.id, literal(lesson_id)).where(User.id.in_(student_ids), User.role == 'STUDENT')
+        result = db.session.execute(
+            dialect.insert(student_lessons)
+            .from_select(['student_id', 'lesson_id'], students)
+            .on_conflict_do_nothing()
+            .returning(student_lessons.c.student_id)
+        )
+        return result.scalars().all()
+
+    @staticmethod
+    def unenroll_students(lesson_id, student_ids):
+        result = db.session.execute(
+            delete(student_lessons)
+            .where(student_lessons.c.lesson_id == lesson_id, student_lessons.c.student_id.in_(student_ids))
+            .returning(student_lessons.c.student_id)
+        )
+        return result.scalars().all()
 
     def __repr__(self):
-        return f'<Lesson {self.title}>'
\ No newline at end of file
+        return f'<Lesson {self.title}>'
+
+
+# Full-text search vectors (Postgres 12+): a generated tsvector column with a GIN index on each
+# searchable table, so the database keeps it in sync on every write. The column is not mapped and
+# lists never load it; utils/search.py queries it by name. Weights: A title, B description, C content.
+SEARCH_VECTORS = {
+    'lesson': "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+              "setweight(to_tsvector('english', coalesce(description, '')), 'B') || "
+              "setweight(to_tsvector('english', coalesce(content, '')), 'C')",
+    'assignment': "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+                  "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+}
+
+for _table in (Lesson.__table__, Assignment.__table__):
+    event.listen(_table, 'after_create', DDL(
+        f'ALTER TABLE {_table.name} ADD COLUMN search_vector tsvector '
+        f'GENERATED ALWAYS AS ({SEARCH_VECTORS[_table.name]}) STORED'
+    ).execute_if(dialect='postgresql'))
+    event.listen(_table, 'after_create', DDL(
+        f'CREATE INDEX ix_{_table.name}_search_vector ON {_table.name} USING gin (search_vector)'
+    ).execute_if(dialect='postgresql'))
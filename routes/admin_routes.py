@@ -1,31 +1,62 @@
+import csv
+import io
+from datetime import datetime
 from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
 from werkzeug.security import generate_password_hash
-from models import db, User, Assignment, Lesson
-from schemas import user_schema, users_schema, assignment_schema, assignments_schema, lesson_schema, lessons_schema
+from models import db, User, Assignment, AssignmentStats, Lesson, Submission, UserTokenCutoff
+from schemas import user_schema, users_summary_schema, assignments_summary_schema, lessons_summary_schema
+from utils.auth import require_role, get_current_user_id, identity_cache
+from utils.pagination import InvalidQueryParam, keyset_paginate, filter_due_range, get_int_arg
+from utils.fields import requested_schema, loader_options
+from utils.hashing import hash_passwords
+from utils.export import stream_export
+from utils.cache import response_cache
+from utils.pool_metrics import pool_metrics
+from utils.instrumentation import request_metrics
+from utils.search import search_paginate, search_type
+from utils.rate_limit import rate_limiter
+from utils.revocation import token_denylist
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
 
+VALID_ROLES = ['ADMIN', 'INSTRUCTOR', 'STUDENT']
+IMPORT_FIELDS = ('username', 'password', 'role')
+BULK_IMPORT_BATCH_SIZE = 1000
+BULK_IMPORT_MAX_ROWS = 10000
+MAX_BULK_ENROLLMENTS = 5000
+
 # Route for getting all the users
 @admin_bp.route('/users', methods=['GET'])
-@jwt_required()
+@require_role('ADMIN')
 def get_users():
     try:
-        current_user_id = get_jwt_identity()
-        admin = User.query.get(current_user_id)
-        
-        if not admin or admin.role != 'ADMIN':
-            return jsonify({
-                'status': 'error',
-                'message': 'Unauthorized access'
-            }), 403
+        schema = requested_schema(users_summary_schema)
+        query = User.query.options(*loader_options(schema))
+        if request.args.get('role'):
+            query = query.filter(User.role == request.args['role'].upper())
+
+        # ?format=ndjson|csv streams the whole filtered table instead of one page
+        if request.args.get('format'):
+            return stream_export(query.order_by(User.id), schema, request.args['format'], 'users')
 
-        users = User.query.all()
+        users, next_cursor = keyset_paginate(query, User, {
+            'id': User.id,
+            'username': User.username,
+            'role': User.role
+        })
         return jsonify({
             'status': 'success',
-            'data': users_schema.dump(users)
+            'data': schema.dump(users),
+            'next': next_cursor
         }), 200
 
+    except InvalidQueryParam as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'status': 'error',
@@ -34,18 +65,10 @@ def get_users():
 
 # Route for creating users
 @admin_bp.route('/users', methods=['POST'])
-@jwt_required()
+@rate_limiter.limit('create')
+@require_role('ADMIN')
 def create_user():
     try:
-        current_user_id = get_jwt_identity()
-        admin = User.query.get(int(current_user_id))
-        
-        if not admin or admin.role != 'ADMIN':
-            return jsonify({
-                'status': 'error',
-                'message': 'Unauthorized access'
-            }), 403
-
         data = request.get_json()
         
         if not data or not all(k in data for k in ['username', 'password', 'role']):
@@ -61,11 +84,10 @@ def create_user():
             }), 400
 
         # Validate role
-        valid_roles = ['ADMIN', 'INSTRUCTOR', 'STUDENT']
-        if data['role'].upper() not in valid_roles:
+        if data['role'].upper() not in VALID_ROLES:
             return jsonify({
                 'status': 'error',
-                'message': f'Invalid role. Must be one of: {", ".join(valid_roles)}'
+                'message': f'Invalid role. Must be one of: {", ".join(VALID_ROLES)}'
             }), 400
 
         hashed_password = generate_password_hash(data['password'])
@@ -91,22 +113,126 @@ def create_user():
             'message': str(e)
         }), 500
 
+# Route for importing many users at once from a JSON array or a text/csv body
+@admin_bp.route('/users/bulk', methods=['POST'])
+@rate_limiter.limit('create')
+@require_role('ADMIN')
+def bulk_create_users():
+    try:
+        if request.mimetype == 'text/csv':
+            # parsed while it streams in, rows are handled batch by batch
+            rows = csv.DictReader(io.TextIOWrapper(request.stream, encoding='utf-8-sig', newline=''))
+            if not rows.fieldnames or not set(IMPORT_FIELDS) <= set(rows.fieldnames):
+                return jsonify({
+                    'status': 'error',
+                    'message': 'CSV header must include username, password and role'
+                }), 400
+        else:
+            rows = request.get_json(silent=True)
+            if not isinstance(rows, list):
+                return jsonify({
+                    'status': 'error',
+                    'message': 'Expected a JSON array of users or a text/csv body'
+                }), 400
+
+        results = []
+        seen = set()
+        batch = []
+        for row_number, row in enumerate(rows, start=1):
+            if row_number > BULK_IMPORT_MAX_ROWS:
+                results.append(_import_result(row_number, row, f'At most {BULK_IMPORT_MAX_ROWS} users per import'))
+                break
+
+            error = _validate_import_row(row, seen)
+            if error:
+                results.append(_import_result(row_number, row, error))
+                continue
+
+            seen.add(row['username'])
+            batch.append((row_number, row))
+            if len(batch) >= BULK_IMPORT_BATCH_SIZE:
+                results.extend(_import_batch(batch))
+                batch = []
+        if batch:
+            results.extend(_import_batch(batch))
+
+        results.sort(key=lambda result: result['row'])
+        created = sum(1 for result in results if result['status'] == 'created')
+        return jsonify({
+            'status': 'success',
+            'message': f'{created} users created successfully',
+            'data': {
+                'created': created,
+                'failed': len(results) - created,
+                'results': results
+            }
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+def _import_result(row_number, row, error=None, user_id=None):
+    result = {
+        'row': row_number,
+        'username': row.get('username') if isinstance(row, dict) else None,
+        'status': 'error' if error else 'created'
+    }
+    if error:
+        result['message'] = error
+    else:
+        result['id'] = user_id
+    return result
+
+def _validate_import_row(row, seen):
+    if not isinstance(row, dict):
+        return 'Row must be an object'
+    if not all(isinstance(row.get(k), str) and row.get(k) for k in IMPORT_FIELDS):
+        return 'Missing required fields'
+    if len(row['username']) > 200:
+        return 'Username is too long'
+    if row['role'].upper() not in VALID_ROLES:
+        return f'Invalid role. Must be one of: {", ".join(VALID_ROLES)}'
+    if row['username'] in seen:
+        return 'Duplicate username in import'
+    return None
+
+# one collision query, one parallel hashing pass and one multi-row INSERT per batch
+def _import_batch(batch):
+    usernames = [row['username'] for _, row in batch]
+    taken = set(db.session.scalars(select(User.username).where(User.username.in_(usernames))))
+
+    results = [_import_result(n, row, 'Username already exists') for n, row in batch if row['username'] in taken]
+    fresh = [(n, row) for n, row in batch if row['username'] not in taken]
+    if not fresh:
+        return results
+
+    hashes = hash_passwords([row['password'] for _, row in fresh])
+    try:
+        inserted = db.session.execute(insert(User).returning(User.id, User.username), [
+            {'username': row['username'], 'password': hashed, 'role': row['role'].upper()}
+            for (_, row), hashed in zip(fresh, hashes)
+        ])
+        ids = {username: user_id for user_id, username in inserted}
+        db.session.commit()
+    except IntegrityError:
+        # a concurrent request took one of the names between the check and the insert
+        db.session.rollback()
+        return results + [_import_result(n, row, 'Username already exists') for n, row in fresh]
+
+    return results + [_import_result(n, row, user_id=ids[row['username']]) for n, row in fresh]
+
 # Route for updating users
 @admin_bp.route('/users/<int:user_id>', methods=['PUT'])
-@jwt_required()
+@require_role('ADMIN')
 def update_user(user_id):
     try:
-        current_user_id = get_jwt_identity()
-        admin = User.query.get(current_user_id)
-        
-        if not admin or admin.role != 'ADMIN':
-            return jsonify({
-                'status': 'error',
-                'message': 'Unauthorized access'
-            }), 403
-
         user = User.query.get_or_404(user_id)
         data = request.get_json()
+        cutoff = None
 
         if 'username' in data:
             existing_user = User.query.filter_by(username=data['username']).first()
@@ -122,15 +248,22 @@ def update_user(user_id):
             
         if 'role' in data:
             # Validate role
-            valid_roles = ['ADMIN', 'INSTRUCTOR', 'STUDENT']
-            if data['role'].upper() not in valid_roles:
+            if data['role'].upper() not in VALID_ROLES:
                 return jsonify({
                     'status': 'error',
-                    'message': f'Invalid role. Must be one of: {", ".join(valid_roles)}'
+                    'message': f'Invalid role. Must be one of: {", ".join(VALID_ROLES)}'
                 }), 400
+            # tokens carry the role, so ones issued before a role change stop working
+            if user.role != data['role'].upper():
+                cutoff = datetime.utcnow()
             user.role = data['role'].upper()
 
+        if cutoff is not None:
+            UserTokenCutoff.cut_off(user.id, cutoff)
         db.session.commit()
+        identity_cache.invalidate(user.id)
+        if cutoff is not None:
+            token_denylist.cut_off(user.id, cutoff)
         
         return jsonify({
             'status': 'success',
@@ -147,28 +280,37 @@ def update_user(user_id):
 
 # Route for deleting users
 @admin_bp.route('/users/<int:user_id>', methods=['DELETE'])
-@jwt_required()
+@require_role('ADMIN')
 def delete_user(user_id):
     try:
-        current_user_id = get_jwt_identity()
-        admin = User.query.get(current_user_id)
-        
-        if not admin or admin.role != 'ADMIN':
-            return jsonify({
-                'status': 'error',
-                'message': 'Unauthorized access'
-            }), 403
-
         user = User.query.get_or_404(user_id)
         
-        if user.id == current_user_id:
+        if user.id == get_current_user_id():
             return jsonify({
                 'status': 'error',
                 'message': 'Cannot delete your own account'
             }), 400
 
+        # a student's submissions go with the row (ON DELETE CASCADE), take them out of the gradebook first
+        submissions = db.session.execute(
+            select(Submission.assignment_id, Assignment.instructor_id, Submission.status, Submission.grade, Submission.seconds_late)
+            .join(Assignment, Assignment.id == Submission.assignment_id)
+            .where(Submission.student_id == user.id)
+        ).all()
+        deltas = {}
+        for assignment_id, instructor_id, status, grade, seconds_late in submissions:
+            changes = deltas.setdefault((assignment_id, instructor_id), {})
+            for counter, change in AssignmentStats.submission_delta((status, grade), None, seconds_late).items():
+                changes[counter] = changes.get(counter, 0) + change
+        AssignmentStats.apply(deltas)
+
+        cutoff = datetime.utcnow()
+        UserTokenCutoff.cut_off(user.id, cutoff)
         db.session.delete(user)
         db.session.commit()
+        identity_cache.invalidate(user_id)
+        token_denylist.cut_off(user_id, cutoff)
+        response_cache.invalidate(*(f'assignment:{assignment_id}:submissions' for assignment_id, *_ in submissions))
         
         return jsonify({
             'status': 'success',
@@ -184,24 +326,41 @@ def delete_user(user_id):
 
 # Route for getting all assignments 
 @admin_bp.route('/assignments', methods=['GET'])
-@jwt_required()
+@require_role('ADMIN')
 def get_assignments():
     try:
-        current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
-        
-        if not current_user or current_user.role != 'ADMIN':
-            return jsonify({
-                'status': 'error',
-                'message': 'Unauthorized access'
-            }), 403
+        schema = requested_schema(assignments_summary_schema)
+        query = Assignment.query.options(*loader_options(schema))
+        if request.args.get('status'):
+            query = query.filter(Assignment.status == request.args['status'])
+        instructor_id = get_int_arg('instructor_id')
+        if instructor_id is not None:
+            query = query.filter(Assignment.instructor_id == instructor_id)
+        student_id = get_int_arg('student_id')
+        if student_id is not None:
+            query = query.filter(Assignment.student_id == student_id)
+        query = filter_due_range(query, Assignment.due_date)
+
+        if request.args.get('format'):
+            return stream_export(query.order_by(Assignment.id), schema, request.args['format'], 'assignments')
 
-        assignments = Assignment.query.all()
+        assignments, next_cursor = keyset_paginate(query, Assignment, {
+            'id': Assignment.id,
+            'title': Assignment.title,
+            'due_date': Assignment.due_date,
+            'status': Assignment.status
+        })
         return jsonify({
             'status': 'success',
-            'data': assignments_schema.dump(assignments)
+            'data': schema.dump(assignments),
+            'next': next_cursor
         }), 200
 
+    except InvalidQueryParam as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'status': 'error',
@@ -210,24 +369,156 @@ def get_assignments():
 
 # Route for getting all lessons
 @admin_bp.route('/lessons', methods=['GET'])
-@jwt_required()
+@require_role('ADMIN')
 def get_lessons():
     try:
-        current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
-        
-        if not current_user or current_user.role != 'ADMIN':
+        schema = requested_schema(lessons_summary_schema)
+        query = Lesson.query.options(*loader_options(schema))
+        instructor_id = get_int_arg('instructor_id')
+        if instructor_id is not None:
+            query = query.filter(Lesson.instructor_id == instructor_id)
+        query = filter_due_range(query, Lesson.due_date)
+
+        if request.args.get('format'):
+            return stream_export(query.order_by(Lesson.id), schema, request.args['format'], 'lessons')
+
+        lessons, next_cursor = keyset_paginate(query, Lesson, {
+            'id': Lesson.id,
+            'title': Lesson.title
+        })
+        return jsonify({
+            'status': 'success',
+            'data': schema.dump(lessons),
+            'next': next_cursor
+        }), 200
+
+    except InvalidQueryParam as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+# Route for enrolling (POST) or unenrolling (DELETE) many students in any lesson
+@admin_bp.route('/lesson/<int:lesson_id>/students', methods=['POST', 'DELETE'])
+@require_role('ADMIN')
+def bulk_enrollment(lesson_id):
+    try:
+        instructor_id = db.session.scalar(select(Lesson.instructor_id).where(Lesson.id == lesson_id))
+
+        if instructor_id is None:
             return jsonify({
                 'status': 'error',
-                'message': 'Unauthorized access'
-            }), 403
+                'message': 'Lesson not found'
+            }), 404
+
+        data = request.get_json()
+        student_ids = data.get('student_ids') if data else None
+
+        if not isinstance(student_ids, list) or not student_ids:
+            return jsonify({
+                'status': 'error',
+                'message': 'Missing student_ids'
+            }), 400
+        if len(student_ids) > MAX_BULK_ENROLLMENTS:
+            return jsonify({
+                'status': 'error',
+                'message': f'At most {MAX_BULK_ENROLLMENTS} students per request'
+            }), 400
+        if not all(isinstance(student_id, int) for student_id in student_ids):
+            return jsonify({
+                'status': 'error',
+                'message': 'student_ids must be integers'
+            }), 400
+
+        if request.method == 'POST':
+            changed = Lesson.enroll_students(lesson_id, student_ids)
+        else:
+            changed = Lesson.unenroll_students(lesson_id, student_ids)
+        db.session.commit()
+        response_cache.invalidate(
+            f'instructor:{instructor_id}:lessons',
+            *(f'student:{student_id}:lessons' for student_id in changed)
+        )
 
-        lessons = Lesson.query.all()
         return jsonify({
             'status': 'success',
-            'data': lessons_schema.dump(lessons)
+            'message': f'{len(changed)} students {"enrolled" if request.method == "POST" else "unenrolled"} successfully',
+            'data': {
+                'changed': sorted(changed),
+                'unchanged': sorted(set(student_ids) - set(changed))
+            }
         }), 200
 
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+# Route for connection pool health, for sizing pools against worker counts
+@admin_bp.route('/metrics/db-pool', methods=['GET'])
+@require_role('ADMIN')
+def db_pool_metrics():
+    try:
+        return jsonify({
+            'status': 'success',
+            'data': pool_metrics.snapshot(db.engine.pool)
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+# Route for per-endpoint request timings (duration histogram, DB time, query counts, serialization)
+@admin_bp.route('/metrics/requests', methods=['GET'])
+@require_role('ADMIN')
+def request_timing_metrics():
+    try:
+        return jsonify({
+            'status': 'success',
+            'data': request_metrics.snapshot()
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+# Route for searching all lessons or assignments, best match first
+@admin_bp.route('/search')
+@require_role('ADMIN')
+def search():
+    try:
+        model = search_type()
+        if model is Lesson:
+            schema = requested_schema(lessons_summary_schema)
+            query = Lesson.query
+        else:
+            schema = requested_schema(assignments_summary_schema)
+            query = Assignment.query
+
+        results, next_cursor = search_paginate(query.options(*loader_options(schema)), model)
+
+        return jsonify({
+            'status': 'success',
+            'data': schema.dump(results),
+            'next': next_cursor
+        }), 200
+
+    except InvalidQueryParam as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'status': 'error',
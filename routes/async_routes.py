@@ -0,0 +1,198 @@
+import json
+from functools import wraps
+import jwt
+from starlette.responses import JSONResponse as StarletteJSONResponse
+from starlette.routing import Route
+from sqlalchemy import select
+from models import Assignment, Lesson, User, student_lessons
+from schemas import assignments_summary_schema, lessons_summary_schema, user_summary_schema
+from utils.async_db import async_db
+from utils.auth import identity_cache
+from utils.revocation import token_denylist
+from utils.pagination import InvalidQueryParam, filter_due_range, keyset_query, keyset_result
+from utils.fields import requested_schema, loader_options
+
+
+# same bytes as Flask's jsonify: sorted keys, compact separators, trailing newline
+class JSONResponse(StarletteJSONResponse):
+    def render(self, content):
+        return (json.dumps(content, sort_keys=True, separators=(',', ':')) + '\n').encode()
+
+
+# the async counterpart of require_role/jwt_required: verifies the same access tokens the Flask
+# app issues and answers with the same 401/422/403 bodies. With no roles any valid token passes.
+def require_role(*roles):
+    def decorator(fn):
+        @wraps(fn)
+        async def wrapper(request):
+            config = request.app.state.config
+            header_type, _, token = request.headers.get(config['JWT_HEADER_NAME'], '').partition(' ')
+            if header_type != config['JWT_HEADER_TYPE'] or not token:
+                return JSONResponse({
+                    'status': 'error',
+                    'message': 'Missing Authorization Header'
+                }, status_code=401)
+            try:
+                claims = jwt.decode(token, config['JWT_SECRET_KEY'], algorithms=[config['JWT_ALGORITHM']])
+                if claims.get('type') != 'access':
+                    raise jwt.InvalidTokenError('Only access tokens are allowed')
+            except jwt.ExpiredSignatureError:
+                return JSONResponse({
+                    'status': 'error',
+                    'message': 'Token has expired'
+                }, status_code=401)
+            except jwt.InvalidTokenError:
+                return JSONResponse({
+                    'status': 'error',
+                    'message': 'Invalid token'
+                }, status_code=422)
+            if token_denylist.claim_sync():
+                try:
+                    async with async_db.engine.connect() as connection:
+                        await connection.run_sync(token_denylist.sync)
+                finally:
+                    token_denylist.release_sync()
+            if token_denylist.revoked(claims):
+                return JSONResponse({
+                    'status': 'error',
+                    'message': 'Token has been revoked'
+                }, status_code=401)
+            if roles and claims.get('role') not in roles:
+                return JSONResponse({
+                    'status': 'error',
+                    'message': 'Unauthorized access'
+                }, status_code=403)
+            request.state.user_id = int(claims['sub'])
+            return await fn(request)
+        return wrapper
+    return decorator
+
+
+@require_role()
+async def verify_token(request):
+    try:
+        user_id = request.state.user_id
+        row = identity_cache.get(user_id)
+        if row is None:
+            async with async_db.session() as session:
+                user = await session.get(User, user_id)
+            if not user:
+                return JSONResponse({'status': 'error', 'message': 'User not found'}, status_code=404)
+            row = {'id': user.id, 'username': user.username, 'role': user.role}
+            ttl = request.app.state.config.get('IDENTITY_CACHE_TTL', 0)
+            if ttl > 0:
+                identity_cache.set(user_id, row, ttl)
+        return JSONResponse({'status': 'success', 'data': {'user': user_summary_schema.dump(row)}})
+    except Exception as e:
+        return JSONResponse({'status': 'error', 'message': str(e)}, status_code=500)
+
+
+@require_role('STUDENT')
+async def student_dashboard(request):
+    try:
+        current_user_id = request.state.user_id
+
+        # same plan as the sync dashboard: one index scan per half of the UNION ALL. The legacy
+        # Query is kept for it because it carries the loader options into the union subquery.
+        def load_assignments(session):
+            open_assignments = session.query(Assignment).filter(Assignment.student_id.is_(None))
+            own_assignments = session.query(Assignment).filter(Assignment.student_id == current_user_id)
+            return open_assignments.union_all(own_assignments).options(
+                *loader_options(assignments_summary_schema)
+            ).order_by(Assignment.id).all()
+
+        lessons_query = select(Lesson).options(*loader_options(lessons_summary_schema)).join(
+            student_lessons, student_lessons.c.lesson_id == Lesson.id
+        ).where(
+            student_lessons.c.student_id == current_user_id
+        ).order_by(Lesson.id)
+
+        async with async_db.session() as session:
+            assignments = await session.run_sync(load_assignments)
+            lessons = (await session.scalars(lessons_query)).all()
+
+        return JSONResponse({
+            'status': 'success',
+            'data': {
+                'assignments': assignments_summary_schema.dump(assignments),
+                'lessons': lessons_summary_schema.dump(lessons)
+            }
+        })
+
+    except Exception as e:
+        return JSONResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status_code=500)
+
+
+@require_role('STUDENT')
+async def student_lessons_list(request):
+    try:
+        schema = requested_schema(lessons_summary_schema, request.query_params)
+        query = select(Lesson).options(*loader_options(schema)).join(
+            student_lessons, student_lessons.c.lesson_id == Lesson.id
+        ).where(
+            student_lessons.c.student_id == request.state.user_id
+        ).order_by(Lesson.id)
+
+        async with async_db.session() as session:
+            lessons = (await session.scalars(query)).unique().all()
+
+        return JSONResponse({
+            'status': 'success',
+            'data': schema.dump(lessons)
+        })
+
+    except InvalidQueryParam as e:
+        return JSONResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status_code=400)
+    except Exception as e:
+        return JSONResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status_code=500)
+
+
+@require_role('INSTRUCTOR')
+async def instructor_lessons_list(request):
+    try:
+        args = request.query_params
+        schema = requested_schema(lessons_summary_schema, args)
+        query = select(Lesson).options(*loader_options(schema)).where(Lesson.instructor_id == request.state.user_id)
+        query = filter_due_range(query, Lesson.due_date, args)
+        query, page = keyset_query(query, Lesson, {
+            'id': Lesson.id,
+            'title': Lesson.title
+        }, args=args)
+
+        async with async_db.session() as session:
+            lessons, next_cursor = keyset_result((await session.scalars(query)).unique().all(), page)
+
+        return JSONResponse({
+            'status': 'success',
+            'data': schema.dump(lessons),
+            'next': next_cursor
+        })
+
+    except InvalidQueryParam as e:
+        return JSONResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status_code=400)
+    except Exception as e:
+        return JSONResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status_code=500)
+
+
+# same paths as the Flask blueprints, so a proxy can send these GETs to the async process
+async_routes = [
+    Route('/api/auth/verify', verify_token, methods=['GET']),
+    Route('/api/student/dashboard', student_dashboard, methods=['GET']),
+    Route('/api/student/lessons', student_lessons_list, methods=['GET']),
+    Route('/api/instructor/lessons', instructor_lessons_list, methods=['GET'])
+]
@@ -1,9 +1,14 @@
 import re
+import time
 from flask import Blueprint, jsonify, request
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from werkzeug.security import check_password_hash, generate_password_hash
-from models import User, db
-from schemas import user_schema
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt
+from models import RevokedToken, User, db
+from schemas import user_summary_schema
+from utils.auth import identity_cache, get_current_user_id, load_current_user
+from utils.hashing import PasswordHashingBusy, check_password, hash_password
+from utils.revocation import token_denylist
+from utils.rate_limit import rate_limiter
+from utils.compression import response_compression
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -13,6 +18,9 @@ def is_valid_password(password):
     return re.match(pattern, password) is not None
 # login route
 @auth_bp.route('/api/auth/login', methods=['POST'])
+@rate_limiter.limit('login')
+# the token sits next to the echoed username, not compressed so its length leaks nothing
+@response_compression.exempt
 def login():
     try:
         data = request.get_json()
@@ -20,11 +28,15 @@ def login():
             return jsonify({'status': 'error', 'message': 'Missing username or password'}), 400
         
         user = User.query.filter_by(username=data['username']).first()
-        if user and check_password_hash(user.password, data['password']):
-            access_token = create_access_token(identity=f"{user.id}", additional_claims={'role': user.role})
-            return jsonify({'status': 'success', 'message': 'Login successful', 'data': {'token': access_token, 'user': user_schema.dump(user)}}), 200
+        if user and check_password(user.password, data['password']):
+            # iat with sub-second precision (a JWT NumericDate may be fractional) so a token issued
+            # right after a role change is told apart from one issued before it in the same second
+            access_token = create_access_token(identity=f"{user.id}", additional_claims={'role': user.role, 'iat': time.time()})
+            return jsonify({'status': 'success', 'message': 'Login successful', 'data': {'token': access_token, 'user': user_summary_schema.dump(user)}}), 200
         
         return jsonify({'status': 'error', 'message': 'Invalid username or password'}), 401
+    except PasswordHashingBusy as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 # token verfication route
@@ -32,39 +44,53 @@ def login():
 @jwt_required()
 def verify_token():
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = load_current_user()
         if not user:
             return jsonify({'status': 'error', 'message': 'User not found'}), 404
-        return jsonify({'status': 'success', 'data': {'user': user_schema.dump(user)}}), 200
+        return jsonify({'status': 'success', 'data': {'user': user_summary_schema.dump(user)}}), 200
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
 @auth_bp.route('/api/auth/logout', methods=['POST'])
 @jwt_required()
 def logout():
-    return jsonify({'status': 'success', 'message': 'Logged out successfully'}), 200
+    try:
+        jti = get_jwt()['jti']
+        RevokedToken.revoke(jti, get_current_user_id())
+        db.session.commit()
+        token_denylist.add(jti)
+        return jsonify({'status': 'success', 'message': 'Logged out successfully'}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'status': 'error', 'message': str(e)}), 500
 # password reset route
 @auth_bp.route('/api/auth/reset-password', methods=['POST'])
+@rate_limiter.limit('reset_password')
 @jwt_required()
 def reset_password():
     try:
         data = request.get_json()
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
 
         if not data or not data.get('old_password') or not data.get('new_password'):
             return jsonify({'status': 'error', 'message': 'Missing password data'}), 400
 
-        if not check_password_hash(user.password, data['old_password']):
+        # straight from the database, the identity cache does not hold password hashes
+        user = db.session.get(User, get_current_user_id())
+        if not user:
+            return jsonify({'status': 'error', 'message': 'User not found'}), 404
+
+        if not check_password(user.password, data['old_password']):
             return jsonify({'status': 'error', 'message': 'Current password is incorrect'}), 401
 
         if not is_valid_password(data['new_password']):
             return jsonify({'status': 'error', 'message': 'New password must be at least 8 characters long, contain at least one uppercase letter, one lowercase letter, one number, and one special character'}), 400
 
-        user.password = generate_password_hash(data['new_password'])
+        user.password = hash_password(data['new_password'])
         db.session.commit()
+        identity_cache.invalidate(user.id)
 
         return jsonify({'status': 'success', 'message': 'Password updated successfully'}), 200
+    except PasswordHashingBusy as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
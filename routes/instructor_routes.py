@@ -1,30 +1,68 @@
+from collections import Counter, defaultdict
+from datetime import datetime
 from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Assignment, Lesson, User
-from schemas import assignment_schema, assignments_schema, lesson_schema, lessons_schema
+from sqlalchemy import case, func, select, update
+from models import db, Assignment, AssignmentStats, Lesson, Submission, student_lessons
+from schemas import assignment_schema, assignments_summary_schema, lesson_schema, lesson_detail_schema, lessons_summary_schema, submissions_summary_schema
+from utils.auth import require_role, get_current_user_id
+from utils.pagination import InvalidQueryParam, keyset_paginate, filter_due_range
+from utils.fields import requested_schema, loader_options
+from utils.cache import response_cache
+from utils.etag import conditional, version_columns
+from utils.search import search_paginate, search_type
+from utils.rate_limit import rate_limiter
+from utils.analytics import GRADE_PERCENTILES, grade_percentiles, summarize_stats
 
 instructor_bp = Blueprint('instructor', __name__, url_prefix='/api/instructor')
+
+MAX_BULK_GRADES = 1000
+MAX_BULK_ENROLLMENTS = 5000
+
+def _assignments_version(user_id):
+    return version_columns(Assignment, Assignment.instructor_id == user_id)
+
+# the roster size is included because ?include=students depends on enrollments
+def _lessons_version(user_id):
+    enrollments = select(func.count()).select_from(student_lessons).join(
+        Lesson, student_lessons.c.lesson_id == Lesson.id
+    ).where(Lesson.instructor_id == user_id).scalar_subquery()
+    return version_columns(Lesson, Lesson.instructor_id == user_id) + [enrollments]
+
+def _submissions_version(user_id, assignment_id):
+    return version_columns(Submission, Submission.assignment_id == assignment_id)
+
 # to see instructor dashboard
 @instructor_bp.route('/dashboard')
-@jwt_required()
+@require_role('INSTRUCTOR')
+@conditional(_assignments_version)
+@response_cache.cached('instructor:{user_id}:assignments')
 def dashboard():
     try:
-        current_user_id = get_jwt_identity()
-        instructor = User.query.get(current_user_id)
-        
-        if not instructor or instructor.role != 'INSTRUCTOR':
-            return jsonify({
-                'status': 'error',
-                'message': 'Unauthorized access'
-            }), 403
+        current_user_id = get_current_user_id()
+        schema = requested_schema(assignments_summary_schema)
+        query = Assignment.query.options(*loader_options(schema)).filter_by(instructor_id=current_user_id)
+        if request.args.get('status'):
+            query = query.filter(Assignment.status == request.args['status'])
+        query = filter_due_range(query, Assignment.due_date)
 
-        assignments = Assignment.query.filter_by(instructor_id=current_user_id).all()
+        assignments, next_cursor = keyset_paginate(query, Assignment, {
+            'id': Assignment.id,
+            'title': Assignment.title,
+            'due_date': Assignment.due_date,
+            'status': Assignment.status
+        })
         
         return jsonify({
             'status': 'success',
-            'data': assignments_schema.dump(assignments)
+            'data': schema.dump(assignments),
+            'next': next_cursor
         }), 200
 
+    except InvalidQueryParam as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'status': 'error',
@@ -32,18 +70,11 @@ def dashboard():
         }), 500
 # route for the instructor to create lesson
 @instructor_bp.route('/lesson', methods=['POST'])
-@jwt_required()
+@rate_limiter.limit('create')
+@require_role('INSTRUCTOR')
 def create_lesson():
     try:
-        current_user_id = get_jwt_identity()
-        instructor = User.query.get(current_user_id)
-        
-        if not instructor or instructor.role != 'INSTRUCTOR':
-            return jsonify({
-                'status': 'error',
-                'message': 'Unauthorized access'
-            }), 403
-
+        current_user_id = get_current_user_id()
         data = request.get_json()
         
         if not data or not data.get('title') or not data.get('content'):
@@ -61,6 +92,7 @@ def create_lesson():
         )
         db.session.add(new_lesson)
         db.session.commit()
+        response_cache.invalidate(f'instructor:{current_user_id}:lessons')
 
         return jsonify({
             'status': 'success',
@@ -76,18 +108,11 @@ def create_lesson():
         }), 500
 # route for instructor to create assignment 
 @instructor_bp.route('/assignment', methods=['POST'])
-@jwt_required()
+@rate_limiter.limit('create')
+@require_role('INSTRUCTOR')
 def create_assignment():
     try:
-        current_user_id = get_jwt_identity()
-        instructor = User.query.get(current_user_id)
-        
-        if not instructor or instructor.role != 'INSTRUCTOR':
-            return jsonify({
-                'status': 'error',
-                'message': 'Unauthorized access'
-            }), 403
-
+        current_user_id = get_current_user_id()
         data = request.get_json()
         
         if not data or not data.get('title') or not data.get('description') or not data.get('due_date'):
@@ -100,11 +125,11 @@ def create_assignment():
             title=data['title'],
             description=data['description'],
             due_date=data['due_date'],
-            instructor_id=current_user_id,
-            status='pending'
+            instructor_id=current_user_id
         )
         db.session.add(new_assignment)
         db.session.commit()
+        response_cache.invalidate('assignments', f'instructor:{current_user_id}:assignments')
 
         return jsonify({
             'status': 'success',
@@ -120,18 +145,10 @@ def create_assignment():
         }), 500
 # route to upddate assignments
 @instructor_bp.route('/assignment/<int:assignment_id>/grade', methods=['PUT'])
-@jwt_required()
+@require_role('INSTRUCTOR')
 def grade_assignment(assignment_id):
     try:
-        current_user_id = get_jwt_identity()
-        instructor = User.query.get(current_user_id)
-        
-        if not instructor or instructor.role != 'INSTRUCTOR':
-            return jsonify({
-                'status': 'error',
-                'message': 'Unauthorized access'
-            }), 403
-
+        current_user_id = get_current_user_id()
         data = request.get_json()
         
         if not data or 'grade' not in data:
@@ -150,7 +167,28 @@ def grade_assignment(assignment_id):
 
         assignment.grade = data['grade']
         assignment.status = 'graded'
+
+        # an assigned student's submission carries the same grade, so the gradebook counts it
+        submission = None
+        if assignment.student_id is not None:
+            submission = Submission.query.filter_by(
+                assignment_id=assignment.id,
+                student_id=assignment.student_id
+            ).with_for_update().first()
+            if submission:
+                before = (submission.status, submission.grade)
+                submission.grade = float(data['grade'])
+                submission.status = 'graded'
+                submission.graded_on = datetime.utcnow()
+                AssignmentStats.apply({
+                    (assignment.id, current_user_id): AssignmentStats.submission_delta(before, ('graded', submission.grade))
+                })
         db.session.commit()
+        response_cache.invalidate(
+            f'instructor:{current_user_id}:assignments',
+            f'student:{assignment.student_id}:assignments' if assignment.student_id else 'assignments',
+            *((f'assignment:{assignment.id}:submissions', f'student:{assignment.student_id}:submissions') if submission else ())
+        )
         
         return jsonify({
             'status': 'success',
@@ -167,25 +205,450 @@ def grade_assignment(assignment_id):
 
 # routes for getting instructor's lessons and assignments
 @instructor_bp.route('/lessons')
-@jwt_required()
+@require_role('INSTRUCTOR')
+@conditional(_lessons_version)
+@response_cache.cached('instructor:{user_id}:lessons')
 def get_lessons():
     try:
-        current_user_id = get_jwt_identity()
-        instructor = User.query.get(current_user_id)
+        current_user_id = get_current_user_id()
+        schema = requested_schema(lessons_summary_schema)
+        query = Lesson.query.options(*loader_options(schema)).filter_by(instructor_id=current_user_id)
+        query = filter_due_range(query, Lesson.due_date)
+
+        lessons, next_cursor = keyset_paginate(query, Lesson, {
+            'id': Lesson.id,
+            'title': Lesson.title
+        })
         
-        if not instructor or instructor.role != 'INSTRUCTOR':
+        return jsonify({
+            'status': 'success',
+            'data': schema.dump(lessons),
+            'next': next_cursor
+        }), 200
+
+    except InvalidQueryParam as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+# route for reading one of the instructor's lessons including its content
+@instructor_bp.route('/lesson/<int:lesson_id>')
+@require_role('INSTRUCTOR')
+def get_lesson(lesson_id):
+    try:
+        lesson = Lesson.query.get_or_404(lesson_id)
+
+        if lesson.instructor_id != get_current_user_id():
             return jsonify({
                 'status': 'error',
-                'message': 'Unauthorized access'
+                'message': 'You can only view your own lessons'
             }), 403
 
-        lessons = Lesson.query.filter_by(instructor_id=current_user_id).all()
-        
         return jsonify({
             'status': 'success',
-            'data': lessons_schema.dump(lessons)
+            'data': lesson_detail_schema.dump(lesson)
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+# route for reading one of the instructor's assignments including its description
+@instructor_bp.route('/assignment/<int:assignment_id>')
+@require_role('INSTRUCTOR')
+def get_assignment(assignment_id):
+    try:
+        assignment = Assignment.query.get_or_404(assignment_id)
+
+        if assignment.instructor_id != get_current_user_id():
+            return jsonify({
+                'status': 'error',
+                'message': 'You can only view your own assignments'
+            }), 403
+
+        return jsonify({
+            'status': 'success',
+            'data': assignment_schema.dump(assignment)
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+# route for listing the submissions of one of the instructor's assignments
+@instructor_bp.route('/assignment/<int:assignment_id>/submissions')
+@require_role('INSTRUCTOR')
+@conditional(_submissions_version)
+@response_cache.cached('assignment:{assignment_id}:submissions')
+def get_submissions(assignment_id):
+    try:
+        current_user_id = get_current_user_id()
+        owner_id = db.session.scalar(select(Assignment.instructor_id).where(Assignment.id == assignment_id))
+
+        if owner_id is None:
+            return jsonify({
+                'status': 'error',
+                'message': 'Assignment not found'
+            }), 404
+        if owner_id != current_user_id:
+            return jsonify({
+                'status': 'error',
+                'message': 'You can only view submissions for your own assignments'
+            }), 403
+
+        schema = requested_schema(submissions_summary_schema)
+        query = Submission.query.options(*loader_options(schema)).filter_by(assignment_id=assignment_id)
+        if request.args.get('status'):
+            query = query.filter(Submission.status == request.args['status'])
+
+        submissions, next_cursor = keyset_paginate(query, Submission, {
+            'id': Submission.id,
+            'submitted_on': Submission.submitted_on
+        })
+
+        return jsonify({
+            'status': 'success',
+            'data': schema.dump(submissions),
+            'next': next_cursor
+        }), 200
+
+    except InvalidQueryParam as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+# route for grading many submissions at once, e.g. {"grades": [{"id": 1, "grade": 87.5}, ...]}
+@instructor_bp.route('/submissions/grade', methods=['PUT'])
+@require_role('INSTRUCTOR')
+def bulk_grade_submissions():
+    try:
+        current_user_id = get_current_user_id()
+        data = request.get_json()
+        entries = data.get('grades') if data else None
+
+        if not isinstance(entries, list) or not entries:
+            return jsonify({
+                'status': 'error',
+                'message': 'Missing grades data'
+            }), 400
+        if len(entries) > MAX_BULK_GRADES:
+            return jsonify({
+                'status': 'error',
+                'message': f'At most {MAX_BULK_GRADES} grades per request'
+            }), 400
+
+        grades = {}
+        for entry in entries:
+            try:
+                grades[int(entry['id'])] = float(entry['grade'])
+            except (KeyError, TypeError, ValueError):
+                return jsonify({
+                    'status': 'error',
+                    'message': 'Each grade needs a submission id and a numeric grade'
+                }), 400
+
+        # one set-based UPDATE for the whole batch, ownership is checked in the WHERE clause. The rows
+        # are locked and read first, the gradebook totals need the grades being replaced.
+        owned_assignments = select(Assignment.id).where(Assignment.instructor_id == current_user_id)
+        previous = db.session.execute(
+            select(Submission.id, Submission.assignment_id, Submission.status, Submission.grade)
+            .where(Submission.id.in_(grades), Submission.assignment_id.in_(owned_assignments))
+            .with_for_update()
+        ).all()
+        graded = db.session.execute(
+            update(Submission)
+            .where(Submission.id.in_(grades), Submission.assignment_id.in_(owned_assignments))
+            .values(grade=case(grades, value=Submission.id), status='graded', graded_on=datetime.utcnow())
+            .returning(Submission.id, Submission.assignment_id, Submission.student_id)
+            .execution_options(synchronize_session=False)
+        ).all()
+
+        stats_deltas = defaultdict(Counter)
+        for submission_id, assignment_id, status, grade in previous:
+            stats_deltas[(assignment_id, current_user_id)].update(
+                AssignmentStats.submission_delta((status, grade), ('graded', grades[submission_id]))
+            )
+        AssignmentStats.apply(stats_deltas)
+        db.session.commit()
+
+        graded_ids = [submission_id for submission_id, _, _ in graded]
+        response_cache.invalidate(
+            *{f'assignment:{assignment_id}:submissions' for _, assignment_id, _ in graded},
+            *{f'student:{student_id}:submissions' for _, _, student_id in graded}
+        )
+
+        return jsonify({
+            'status': 'success',
+            'message': f'{len(graded_ids)} submissions graded successfully',
+            'data': {
+                'graded': sorted(graded_ids),
+                'skipped': sorted(set(grades) - set(graded_ids))
+            }
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+# route for enrolling (POST) or unenrolling (DELETE) many students at once, e.g. {"student_ids": [1, 2]}
+@instructor_bp.route('/lesson/<int:lesson_id>/students', methods=['POST', 'DELETE'])
+@require_role('INSTRUCTOR')
+def bulk_enrollment(lesson_id):
+    try:
+        current_user_id = get_current_user_id()
+        owner_id = db.session.scalar(select(Lesson.instructor_id).where(Lesson.id == lesson_id))
+
+        if owner_id is None:
+            return jsonify({
+                'status': 'error',
+                'message': 'Lesson not found'
+            }), 404
+        if owner_id != current_user_id:
+            return jsonify({
+                'status': 'error',
+                'message': 'You can only manage enrollment for your own lessons'
+            }), 403
+
+        data = request.get_json()
+        student_ids = data.get('student_ids') if data else None
+
+        if not isinstance(student_ids, list) or not student_ids:
+            return jsonify({
+                'status': 'error',
+                'message': 'Missing student_ids'
+            }), 400
+        if len(student_ids) > MAX_BULK_ENROLLMENTS:
+            return jsonify({
+                'status': 'error',
+                'message': f'At most {MAX_BULK_ENROLLMENTS} students per request'
+            }), 400
+        if not all(isinstance(student_id, int) for student_id in student_ids):
+            return jsonify({
+                'status': 'error',
+                'message': 'student_ids must be integers'
+            }), 400
+
+        if request.method == 'POST':
+            changed = Lesson.enroll_students(lesson_id, student_ids)
+        else:
+            changed = Lesson.unenroll_students(lesson_id, student_ids)
+        db.session.commit()
+        response_cache.invalidate(
+            f'instructor:{current_user_id}:lessons',
+            *(f'student:{student_id}:lessons' for student_id in changed)
+        )
+
+        return jsonify({
+            'status': 'success',
+            'message': f'{len(changed)} students {"enrolled" if request.method == "POST" else "unenrolled"} successfully',
+            'data': {
+                'changed': sorted(changed),
+                'unchanged': sorted(set(student_ids) - set(changed))
+            }
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+# route for searching the instructor's own lessons or assignments, best match first
+@instructor_bp.route('/search')
+@require_role('INSTRUCTOR')
+def search():
+    try:
+        current_user_id = get_current_user_id()
+        model = search_type()
+        if model is Lesson:
+            schema = requested_schema(lessons_summary_schema)
+            query = Lesson.query.filter_by(instructor_id=current_user_id)
+        else:
+            schema = requested_schema(assignments_summary_schema)
+            query = Assignment.query.filter_by(instructor_id=current_user_id)
+
+        results, next_cursor = search_paginate(query.options(*loader_options(schema)), model)
+
+        return jsonify({
+            'status': 'success',
+            'data': schema.dump(results),
+            'next': next_cursor
         }), 200
 
+    except InvalidQueryParam as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+# gradebook overview for the instructor: assignments by status and totals across all submissions
+@instructor_bp.route('/analytics')
+@require_role('INSTRUCTOR')
+def analytics():
+    try:
+        current_user_id = get_current_user_id()
+
+        by_status = dict(db.session.execute(
+            select(Assignment.status, func.count())
+            .where(Assignment.instructor_id == current_user_id)
+            .group_by(Assignment.status)
+        ).all())
+
+        # one row per assignment in the summary table, no submission is read
+        totals = db.session.execute(select(
+            func.coalesce(func.sum(AssignmentStats.submitted_count), 0),
+            func.coalesce(func.sum(AssignmentStats.graded_count), 0),
+            func.coalesce(func.sum(AssignmentStats.grade_sum), 0.0),
+            func.coalesce(func.sum(AssignmentStats.late_count), 0),
+            func.coalesce(func.sum(AssignmentStats.lateness_sum), 0.0)
+        ).where(AssignmentStats.instructor_id == current_user_id)).one()
+        overall = summarize_stats(AssignmentStats(
+            submitted_count=totals[0],
+            graded_count=totals[1],
+            grade_sum=totals[2],
+            late_count=totals[3],
+            lateness_sum=totals[4]
+        ))
+
+        lessons, enrollments = db.session.execute(
+            select(func.count(func.distinct(Lesson.id)), func.count(student_lessons.c.student_id))
+            .select_from(Lesson)
+            .outerjoin(student_lessons, student_lessons.c.lesson_id == Lesson.id)
+            .where(Lesson.instructor_id == current_user_id)
+        ).one()
+
+        return jsonify({
+            'status': 'success',
+            'data': {
+                'assignments': {
+                    'total': sum(by_status.values()),
+                    'by_status': by_status
+                },
+                'submissions': overall,
+                'lessons': {
+                    'total': lessons,
+                    'enrollments': enrollments
+                }
+            }
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+# per-assignment gradebook: submission counts, mean and percentile grades and lateness, paginated
+@instructor_bp.route('/analytics/assignments')
+@require_role('INSTRUCTOR')
+def assignment_analytics():
+    try:
+        current_user_id = get_current_user_id()
+        schema = requested_schema(assignments_summary_schema)
+        query = Assignment.query.options(*loader_options(schema)).filter_by(instructor_id=current_user_id)
+        if request.args.get('status'):
+            query = query.filter(Assignment.status == request.args['status'])
+        query = filter_due_range(query, Assignment.due_date)
+
+        assignments, next_cursor = keyset_paginate(query, Assignment, {
+            'id': Assignment.id,
+            'title': Assignment.title,
+            'due_date': Assignment.due_date
+        })
+
+        assignment_ids = [assignment.id for assignment in assignments]
+        stats = {row.assignment_id: row for row in AssignmentStats.query.filter(
+            AssignmentStats.assignment_id.in_(assignment_ids)
+        )}
+        percentiles = grade_percentiles(assignment_ids)
+        empty = {f'p{p}': None for p in GRADE_PERCENTILES}
+
+        data = []
+        for assignment, item in zip(assignments, schema.dump(assignments)):
+            item['gradebook'] = dict(
+                summarize_stats(stats.get(assignment.id)),
+                grade_percentiles=percentiles.get(assignment.id, empty)
+            )
+            data.append(item)
+
+        return jsonify({
+            'status': 'success',
+            'data': data,
+            'next': next_cursor
+        }), 200
+
+    except InvalidQueryParam as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+# per-lesson enrollment counts; lessons have no assignments or grades of their own
+@instructor_bp.route('/analytics/lessons')
+@require_role('INSTRUCTOR')
+def lesson_analytics():
+    try:
+        current_user_id = get_current_user_id()
+        schema = requested_schema(lessons_summary_schema)
+        query = Lesson.query.options(*loader_options(schema)).filter_by(instructor_id=current_user_id)
+
+        lessons, next_cursor = keyset_paginate(query, Lesson, {
+            'id': Lesson.id,
+            'title': Lesson.title
+        })
+
+        enrolled = dict(db.session.execute(
+            select(student_lessons.c.lesson_id, func.count())
+            .where(student_lessons.c.lesson_id.in_([lesson.id for lesson in lessons]))
+            .group_by(student_lessons.c.lesson_id)
+        ).all())
+
+        data = []
+        for lesson, item in zip(lessons, schema.dump(lessons)):
+            item['enrolled'] = enrolled.get(lesson.id, 0)
+            data.append(item)
+
+        return jsonify({
+            'status': 'success',
+            'data': data,
+            'next': next_cursor
+        }), 200
+
+    except InvalidQueryParam as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'status': 'error',
@@ -1,37 +1,64 @@
+from datetime import datetime
 from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Assignment, Lesson, User  
-from schemas import assignment_schema, assignments_schema, lesson_schema, lessons_schema
+from sqlalchemy import exists, or_, update
+from sqlalchemy.exc import IntegrityError
+from models import db, Assignment, AssignmentStats, Lesson, Submission, student_lessons
+from schemas import assignment_schema, assignments_summary_schema, lesson_detail_schema, lesson_summary_schema, lessons_summary_schema, submission_schema, submissions_summary_schema
+from utils.auth import require_role, get_current_user_id
+from utils.pagination import InvalidQueryParam, keyset_paginate
+from utils.fields import requested_schema, loader_options
+from utils.cache import response_cache
+from utils.etag import conditional, version_columns
+from utils.search import search_paginate, search_type
+from utils.rate_limit import rate_limiter
 
 student_bp = Blueprint('student', __name__, url_prefix='/api/student')
 
+def _own_assignments_version(user_id):
+    return version_columns(Assignment, Assignment.student_id == user_id)
+
+def _lessons_version(user_id):
+    return version_columns(
+        Lesson, student_lessons.c.student_id == user_id,
+        join=(student_lessons, student_lessons.c.lesson_id == Lesson.id)
+    )
+
+def _dashboard_version(user_id):
+    return (version_columns(Assignment, Assignment.student_id.is_(None))
+            + _own_assignments_version(user_id)
+            + _lessons_version(user_id))
+
+def _submissions_version(user_id):
+    return version_columns(Submission, Submission.student_id == user_id)
+
 @student_bp.route('/dashboard')
-@jwt_required()
+@require_role('STUDENT')
+@conditional(_dashboard_version)
+@response_cache.cached('assignments', 'student:{user_id}:assignments', 'student:{user_id}:lessons')
 def dashboard():
     try:
-        current_user_id = get_jwt_identity()
-        student = User.query.get(current_user_id)
-        
-        if not student or not student.is_student():  
-            return jsonify({
-                'status': 'error',
-                'message': 'Unauthorized access'
-            }), 403
+        current_user_id = get_current_user_id()
 
-        # Get assignments assigned to this student
-        assignments = Assignment.query.filter(
-            (Assignment.student_id == None) |  
-            (Assignment.student_id == current_user_id)  
-        ).all()
+        # Get assignments assigned to this student. The OR of both conditions defeats the
+        # indexes, so each half is its own index scan (partial index for the open ones).
+        open_assignments = Assignment.query.filter(Assignment.student_id.is_(None))
+        own_assignments = Assignment.query.filter(Assignment.student_id == current_user_id)
+        assignments = open_assignments.union_all(own_assignments).options(
+            *loader_options(assignments_summary_schema)
+        ).order_by(Assignment.id).all()
 
-        # Get lessons for this student
-        lessons = student.student_lessons
+        # Get lessons for this student straight from the enrollment primary key
+        lessons = Lesson.query.options(*loader_options(lessons_summary_schema)).join(
+            student_lessons, student_lessons.c.lesson_id == Lesson.id
+        ).filter(
+            student_lessons.c.student_id == current_user_id
+        ).order_by(Lesson.id).all()
 
         return jsonify({
             'status': 'success',
             'data': {
-                'assignments': assignments_schema.dump(assignments),
-                'lessons': lessons_schema.dump(lessons)
+                'assignments': assignments_summary_schema.dump(assignments),
+                'lessons': lessons_summary_schema.dump(lessons)
             }
         }), 200
 
@@ -42,18 +69,10 @@ def dashboard():
         }), 500
 # route for submitting assignment 
 @student_bp.route('/assignment/<int:assignment_id>/submit', methods=['POST'])
-@jwt_required()
+@rate_limiter.limit('submit')
+@require_role('STUDENT')
 def submit_assignment(assignment_id):
     try:
-        current_user_id = get_jwt_identity()
-        student = User.query.get(current_user_id)
-        
-        if not student or not student.is_student():  
-            return jsonify({
-                'status': 'error',
-                'message': 'Unauthorized access'
-            }), 403
-
         assignment = Assignment.query.get_or_404(assignment_id)
         data = request.get_json()
 
@@ -63,14 +82,59 @@ def submit_assignment(assignment_id):
                 'message': 'Missing submission data'
             }), 400
 
-        
-        assignment.submit(student.id, data['submission'])
+        current_user_id = get_current_user_id()
+        if assignment.student_id is not None and assignment.student_id != current_user_id:
+            return jsonify({
+                'status': 'error',
+                'message': 'This assignment is assigned to another student'
+            }), 403
+
+        # each student writes their own row, so submissions never contend on the assignment
+        own_submission = Submission.query.filter_by(
+            assignment_id=assignment.id,
+            student_id=current_user_id
+        ).with_for_update()
+        submission = own_submission.first()
+        created = False
+        if submission is None:
+            submission = Submission(
+                assignment_id=assignment.id,
+                student_id=current_user_id,
+                body=data['submission']
+            )
+            # lateness is fixed at the first submission, resubmitting does not change it
+            submission.seconds_late = AssignmentStats.seconds_late(submission.submitted_on, assignment.due_date)
+            try:
+                with db.session.begin_nested():
+                    db.session.add(submission)
+                created = True
+            except IntegrityError:
+                # a concurrent first submit inserted the row after our select, resubmit over it
+                submission = own_submission.one()
+
+        if created:
+            stats_delta = AssignmentStats.submission_delta(None, ('submitted', None), submission.seconds_late)
+        else:
+            stats_delta = AssignmentStats.submission_delta((submission.status, submission.grade), ('submitted', None))
+            submission.resubmit(data['submission'])
+        AssignmentStats.apply({(assignment.id, assignment.instructor_id): stats_delta})
+        # late submissions are accepted (seconds_late records it), an overdue assignment is pending
+        # again once handed in. Only an overdue row matches, so open assignments are not locked.
+        reopened = db.session.execute(
+            update(Assignment).where(Assignment.id == assignment.id, Assignment.status == 'overdue')
+            .values(status='pending', updated_on=datetime.utcnow())
+        ).rowcount
         db.session.commit()
+        response_cache.invalidate(
+            f'student:{current_user_id}:submissions',
+            f'assignment:{assignment.id}:submissions',
+            *((f'student:{current_user_id}:assignments', f'instructor:{assignment.instructor_id}:assignments') if reopened else ())
+        )
         
         return jsonify({
             'status': 'success',
             'message': 'Assignment submitted successfully',
-            'data': assignment_schema.dump(assignment)
+            'data': submission_schema.dump(submission)
         }), 200
 
     except Exception as e:
@@ -81,23 +145,52 @@ def submit_assignment(assignment_id):
         }), 500
 # route for viewing student lessons
 @student_bp.route('/lessons')
-@jwt_required()
+@require_role('STUDENT')
+@conditional(_lessons_version)
+@response_cache.cached('student:{user_id}:lessons')
 def view_lessons():
     try:
-        current_user_id = get_jwt_identity()
-        student = User.query.get(current_user_id)
+        schema = requested_schema(lessons_summary_schema)
+        lessons = Lesson.query.options(*loader_options(schema)).join(
+            student_lessons, student_lessons.c.lesson_id == Lesson.id
+        ).filter(student_lessons.c.student_id == get_current_user_id()).all()
         
-        if not student or not student.is_student():  
+        return jsonify({
+            'status': 'success',
+            'data': schema.dump(lessons)
+        }), 200
+
+    except InvalidQueryParam as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+# route for reading one enrolled lesson including its content, lists only carry content_length
+@student_bp.route('/lesson/<int:lesson_id>')
+@require_role('STUDENT')
+def view_lesson(lesson_id):
+    try:
+        enrolled = db.session.scalar(exists().where(
+            student_lessons.c.student_id == get_current_user_id(),
+            student_lessons.c.lesson_id == lesson_id
+        ).select())
+
+        if not enrolled:
             return jsonify({
                 'status': 'error',
-                'message': 'Unauthorized access'
+                'message': 'You are not enrolled in this lesson'
             }), 403
 
-        lessons = student.student_lessons.all()
-        
+        lesson = Lesson.query.get_or_404(lesson_id)
+
         return jsonify({
             'status': 'success',
-            'data': lessons_schema.dump(lessons)
+            'data': lesson_detail_schema.dump(lesson)
         }), 200
 
     except Exception as e:
@@ -105,28 +198,84 @@ def view_lessons():
             'status': 'error',
             'message': str(e)
         }), 500
-# route for viewing the assignments
-@student_bp.route('/my-assignments')
-@jwt_required()
-def my_assignments():
+# route for reading one assignment including its description
+@student_bp.route('/assignment/<int:assignment_id>')
+@require_role('STUDENT')
+def view_assignment(assignment_id):
     try:
-        current_user_id = get_jwt_identity()
-        student = User.query.get(current_user_id)
-        
-        if not student or not student.is_student():  
+        assignment = Assignment.query.get_or_404(assignment_id)
+
+        if assignment.student_id is not None and assignment.student_id != get_current_user_id():
             return jsonify({
                 'status': 'error',
-                'message': 'Unauthorized access'
+                'message': 'This assignment is assigned to another student'
             }), 403
 
-        # Get assignments submitted by this student
-        assignments = student.student_assignments  
+        return jsonify({
+            'status': 'success',
+            'data': assignment_schema.dump(assignment)
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+# route for viewing the assignments
+@student_bp.route('/my-assignments')
+@require_role('STUDENT')
+@conditional(_own_assignments_version)
+@response_cache.cached('student:{user_id}:assignments')
+def my_assignments():
+    try:
+        # assignments given to this student; what they handed in is listed by /my-submissions
+        schema = requested_schema(assignments_summary_schema)
+        assignments = Assignment.query.options(*loader_options(schema)).filter_by(student_id=get_current_user_id()).all()
         
         return jsonify({
             'status': 'success',
-            'data': assignments_schema.dump(assignments)
+            'data': schema.dump(assignments)
+        }), 200
+
+    except InvalidQueryParam as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+# route for viewing the student's own submissions and their grades
+@student_bp.route('/my-submissions')
+@require_role('STUDENT')
+@conditional(_submissions_version)
+@response_cache.cached('student:{user_id}:submissions')
+def my_submissions():
+    try:
+        schema = requested_schema(submissions_summary_schema)
+        query = Submission.query.options(*loader_options(schema)).filter_by(student_id=get_current_user_id())
+        if request.args.get('status'):
+            query = query.filter(Submission.status == request.args['status'])
+
+        submissions, next_cursor = keyset_paginate(query, Submission, {
+            'id': Submission.id,
+            'submitted_on': Submission.submitted_on
+        })
+
+        return jsonify({
+            'status': 'success',
+            'data': schema.dump(submissions),
+            'next': next_cursor
         }), 200
 
+    except InvalidQueryParam as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'status': 'error',
@@ -135,30 +284,60 @@ def my_assignments():
 
 # New route to enroll in a lesson
 @student_bp.route('/lesson/<int:lesson_id>/enroll', methods=['POST'])
-@jwt_required()
+@require_role('STUDENT')
 def enroll_lesson(lesson_id):
     try:
-        current_user_id = get_jwt_identity()
-        student = User.query.get(current_user_id)
-        
-        if not student or not student.is_student():
-            return jsonify({
-                'status': 'error',
-                'message': 'Unauthorized access'
-            }), 403
+        current_user_id = get_current_user_id()
 
-        lesson = Lesson.query.get_or_404(lesson_id)
-        lesson.add_student(student) 
+        lesson = Lesson.query.options(*loader_options(lesson_summary_schema)).get_or_404(lesson_id)
+        Lesson.enroll_students(lesson.id, [current_user_id])
         db.session.commit()
+        response_cache.invalidate(f'student:{current_user_id}:lessons', f'instructor:{lesson.instructor_id}:lessons')
         
         return jsonify({
             'status': 'success',
             'message': 'Enrolled in lesson successfully',
-            'data': lesson_schema.dump(lesson)
+            'data': lesson_summary_schema.dump(lesson)
         }), 200
 
     except Exception as e:
         db.session.rollback()
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+# route for searching the lesson catalog or the student's assignments, best match first
+@student_bp.route('/search')
+@require_role('STUDENT')
+def search():
+    try:
+        current_user_id = get_current_user_id()
+        model = search_type()
+        if model is Lesson:
+            schema = requested_schema(lessons_summary_schema)
+            query = Lesson.query
+        else:
+            schema = requested_schema(assignments_summary_schema)
+            query = Assignment.query.filter(or_(
+                Assignment.student_id.is_(None),
+                Assignment.student_id == current_user_id
+            ))
+
+        results, next_cursor = search_paginate(query.options(*loader_options(schema)), model)
+
+        return jsonify({
+            'status': 'success',
+            'data': schema.dump(results),
+            'next': next_cursor
+        }), 200
+
+    except InvalidQueryParam as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    except Exception as e:
         return jsonify({
             'status': 'error',
             'message': str(e)
@@ -1,10 +1,33 @@
 from flask_marshmallow import Marshmallow
 from marshmallow_sqlalchemy import SQLAlchemyAutoSchema, auto_field
-from models import User, Assignment, Lesson
+from models import User, Assignment, Lesson, Submission
+from utils.instrumentation import request_metrics
+from schemas.compiled import compile_dumpers
 
 ma = Marshmallow()
 
-class UserSchema(SQLAlchemyAutoSchema):
+# Column-only field sets used by list endpoints and login, none of them touch a relationship
+USER_SUMMARY_FIELDS = ('id', 'username', 'role')
+ASSIGNMENT_SUMMARY_FIELDS = ('id', 'title', 'description_length', 'due_date', 'status', 'grade', 'instructor_id', 'student_id', 'submitted_on', 'graded_on')
+LESSON_SUMMARY_FIELDS = ('id', 'title', 'content_length', 'due_date', 'instructor_id')
+SUBMISSION_SUMMARY_FIELDS = ('id', 'assignment_id', 'student_id', 'status', 'grade', 'submitted_on', 'seconds_late', 'updated_on', 'graded_on')
+
+# base for the schemas below, dumps are timed as serialization in the request metrics. Every
+# instance (one per only/exclude variant) compiles its dump functions when it is created, see
+# schemas/compiled.py; dump() falls back to marshmallow when it could not.
+class TimedSchema(SQLAlchemyAutoSchema):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._dump_one, self._dump_many = compile_dumpers(self) or (None, None)
+
+    def dump(self, obj, *, many=None):
+        with request_metrics.serializing():
+            many = self.many if many is None else bool(many)
+            if self._dump_one is None or (many and obj is None):
+                return super().dump(obj, many=many)
+            return self._dump_many(obj) if many else self._dump_one(obj)
+
+class UserSchema(TimedSchema):
     class Meta:
         model = User
         include_relationships = True
@@ -14,6 +37,8 @@ class UserSchema(SQLAlchemyAutoSchema):
     id = auto_field()
     username = auto_field()
     role = auto_field()
+    # the hash is never dumped, not even when ?fields= asks for it
+    password = auto_field(load_only=True)
     
     
     # exclude to avoid circular imports by using strings for nested schemas
@@ -22,7 +47,7 @@ class UserSchema(SQLAlchemyAutoSchema):
     lessons = ma.Nested('LessonSchema', many=True, exclude=('instructor', 'students'))
     student_lessons = ma.Nested('LessonSchema', many=True, exclude=('instructor', 'students'))
 
-class AssignmentSchema(SQLAlchemyAutoSchema):
+class AssignmentSchema(TimedSchema):
     class Meta:
         model = Assignment
         include_relationships = True
@@ -37,11 +62,11 @@ class AssignmentSchema(SQLAlchemyAutoSchema):
     grade = auto_field()
     submission = auto_field()
     
-    # exclude to avoid circular nesting by excluding nested relationships
-    instructor = ma.Nested('UserSchema', exclude=('assignments', 'student_assignments', 'lessons', 'student_lessons'))
-    student = ma.Nested('UserSchema', exclude=('assignments', 'student_assignments', 'lessons', 'student_lessons'))
+    # nested users only carry their summary columns, which also avoids circular nesting
+    instructor = ma.Nested('UserSchema', only=USER_SUMMARY_FIELDS)
+    student = ma.Nested('UserSchema', only=USER_SUMMARY_FIELDS)
 
-class LessonSchema(SQLAlchemyAutoSchema):
+class LessonSchema(TimedSchema):
     class Meta:
         model = Lesson
         include_relationships = True
@@ -54,9 +79,24 @@ class LessonSchema(SQLAlchemyAutoSchema):
     description = auto_field()
     due_date = auto_field()
     
-    # exclude to avoid circular nesting by excluding nested relationships
-    instructor = ma.Nested('UserSchema', exclude=('assignments', 'student_assignments', 'lessons', 'student_lessons'))
-    students = ma.Nested('UserSchema', many=True, exclude=('assignments', 'student_assignments', 'lessons', 'student_lessons'))
+    # nested users only carry their summary columns, which also avoids circular nesting
+    instructor = ma.Nested('UserSchema', only=USER_SUMMARY_FIELDS)
+    students = ma.Nested('UserSchema', many=True, only=USER_SUMMARY_FIELDS)
+
+class SubmissionSchema(TimedSchema):
+    class Meta:
+        model = Submission
+        include_relationships = True
+        load_instance = True
+        include_fk = True
+
+    id = auto_field()
+    body = auto_field()
+    status = auto_field()
+    grade = auto_field()
+
+    assignment = ma.Nested('AssignmentSchema', only=ASSIGNMENT_SUMMARY_FIELDS)
+    student = ma.Nested('UserSchema', only=USER_SUMMARY_FIELDS)
 
 # Schema instances
 user_schema = UserSchema()
@@ -66,4 +106,17 @@ assignment_schema = AssignmentSchema()
 assignments_schema = AssignmentSchema(many=True)
 
 lesson_schema = LessonSchema()
-lessons_schema = LessonSchema(many=True)
\ No newline at end of file
+lessons_schema = LessonSchema(many=True)
+# single lesson with its content but without the (possibly large) roster
+lesson_detail_schema = LessonSchema(exclude=('students',))
+
+user_summary_schema = UserSchema(only=USER_SUMMARY_FIELDS)
+users_summary_schema = UserSchema(only=USER_SUMMARY_FIELDS, many=True)
+
+assignments_summary_schema = AssignmentSchema(only=ASSIGNMENT_SUMMARY_FIELDS, many=True)
+
+lesson_summary_schema = LessonSchema(only=LESSON_SUMMARY_FIELDS)
+lessons_summary_schema = LessonSchema(only=LESSON_SUMMARY_FIELDS, many=True)
+
+submission_schema = SubmissionSchema(exclude=('assignment', 'student'))
+submissions_summary_schema = SubmissionSchema(only=SUBMISSION_SUMMARY_FIELDS, many=True)
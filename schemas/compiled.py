@@ -0,0 +1,77 @@
+from marshmallow import fields
+from marshmallow.decorators import POST_DUMP, PRE_DUMP
+from marshmallow.utils import ensure_text_type, missing
+
+ISO_FORMATS = (None, 'iso', 'iso8601')
+
+
+# The expression that serializes local `v` for one field, the same value the field's _serialize
+# returns, or None when the field needs marshmallow's own serialize().
+def _field_expression(field, name, namespace):
+    field_type = type(field)
+    if field_type is fields.String:
+        namespace['_text'] = ensure_text_type
+        return 'v if v is None or v.__class__ is str else _text(v)'
+    if field_type in (fields.Integer, fields.Float) and not field.as_string:
+        cast = f'_{field.num_type.__name__}'
+        namespace[cast] = field.num_type
+        return f'None if v is None else {cast}(v)'
+    if field_type in (fields.DateTime, fields.Date) and field.format in ISO_FORMATS:
+        return 'None if v is None else v.isoformat()'
+    if field_type is fields.Nested:
+        nested = field.schema
+        many = nested.many or field.many
+        dumper = getattr(nested, '_dump_many' if many else '_dump_one', None)
+        if dumper is None:
+            namespace[f'_schema_{name}'] = nested
+            return f'None if v is None else _schema_{name}.dump(v, many={many})'
+        namespace[f'_nested_{name}'] = dumper
+        return f'None if v is None else _nested_{name}(v)'
+    return None
+
+
+# marshmallow keys Schema._hooks by (tag, pass_many) before 3.26 and by tag from 3.26 on
+def _has_dump_hooks(schema):
+    tags = {key[0] if isinstance(key, tuple) else key for key, hooks in schema._hooks.items() if hooks}
+    return PRE_DUMP in tags or POST_DUMP in tags
+
+
+# Builds (dump_one, dump_many) for a schema instance: plain functions that read each dumped
+# attribute and convert it inline, skipping marshmallow's per-field dispatch. They return what
+# schema.dump would, for the schema's model; anything else (e.g. dict rows) goes through
+# marshmallow. Returns None for schemas with dump hooks or ordered output, those stay on marshmallow.
+def compile_dumpers(schema):
+    if _has_dump_hooks(schema) or schema.dict_class is not dict:
+        return None
+    model = schema.opts.model
+
+    namespace = {
+        '_model': model,
+        '_missing': missing,
+        '_fallback': lambda obj: schema._serialize(obj, many=False)
+    }
+    lines = [
+        'def dump_one(obj):',
+        '    if obj.__class__ is not _model:',
+        '        return _fallback(obj)',
+        '    data = {}'
+    ]
+    for index, (name, field) in enumerate(schema.dump_fields.items()):
+        key = field.data_key if field.data_key is not None else name
+        attribute = field.attribute or name
+        expression = _field_expression(field, f'{index}', namespace)
+        if expression is not None and attribute.isidentifier() and '.' not in attribute:
+            lines.append(f'    v = obj.{attribute}')
+            lines.append(f'    data[{key!r}] = {expression}')
+        else:
+            namespace[f'_field_{index}'] = field
+            namespace['_get_attribute'] = schema.get_attribute
+            lines.append(f'    v = _field_{index}.serialize({name!r}, obj, accessor=_get_attribute)')
+            lines.append('    if v is not _missing:')
+            lines.append(f'        data[{key!r}] = v')
+    lines.append('    return data')
+    lines.append('def dump_many(objs):')
+    lines.append('    return [dump_one(obj) for obj in objs]')
+
+    exec(compile('\n'.join(lines), f'<dumper {type(schema).__name__}>', 'exec'), namespace)
+    return namespace['dump_one'], namespace['dump_many']
@@ -0,0 +1,40 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# median seconds `import app` may take in a fresh interpreter
+BUDGET = float(os.getenv('STARTUP_BUDGET_SECONDS', 1.0))
+RUNS = 5
+
+# imports the app the way a WSGI worker does and reports the time and what got imported
+SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+print(json.dumps({'seconds': elapsed, 'modules': sorted(sys.modules)}))
+'''
+
+
+def _import_app():
+    # the database host cannot resolve, so an import that touched the database would fail
+    env = dict(os.environ, DB_HOST='startup-check.invalid', DB_PORT='5432',
+               FLASK_RUN_FROM_CLI='false', ENABLE_CLI_COMMANDS='false', ENABLE_MIGRATIONS='false')
+    result = subprocess.run([sys.executable, '-c', SCRIPT], cwd=ROOT, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_cold_start_within_budget():
+    timings = [_import_app()['seconds'] for _ in range(RUNS)]
+    assert statistics.median(timings) <= BUDGET, f'cold start {sorted(timings)} over the {BUDGET}s budget'
+
+
+def test_worker_boot_skips_routes_and_cli_tooling():
+    modules = _import_app()['modules']
+    loaded = [m for m in modules if m.split('.')[0] in ('routes', 'schemas', 'benchmarks', 'commands', 'flask_migrate', 'alembic')]
+    assert loaded == []
@@ -0,0 +1,60 @@
+from sqlalchemy import func, select
+from models import db, Submission
+
+# nearest-rank grade percentiles reported per assignment, 0 and 100 are the min and max
+GRADE_PERCENTILES = (0, 25, 50, 75, 90, 100)
+
+
+def _rank_position(count, percentile):
+    return max(1, (count * percentile + 99) // 100)
+
+
+# Grade percentiles for many assignments in one query: a window numbers each assignment's graded
+# submissions by grade and the outer query keeps only the rows at the percentile positions, so at
+# most len(GRADE_PERCENTILES) rows per assignment leave the database.
+def grade_percentiles(assignment_ids):
+    if not assignment_ids:
+        return {}
+    ranked = select(
+        Submission.assignment_id,
+        Submission.grade,
+        func.row_number().over(partition_by=Submission.assignment_id, order_by=Submission.grade).label('position'),
+        func.count().over(partition_by=Submission.assignment_id).label('graded')
+    ).where(
+        Submission.assignment_id.in_(assignment_ids),
+        Submission.status == 'graded',
+        Submission.grade.isnot(None)
+    ).subquery()
+
+    positions = [1 if p == 0 else (ranked.c.graded * p + 99) // 100 for p in GRADE_PERCENTILES]
+    rows = db.session.execute(
+        select(ranked.c.assignment_id, ranked.c.position, ranked.c.graded, ranked.c.grade)
+        .where(ranked.c.position.in_(positions))
+    ).all()
+
+    grades = {}
+    counts = {}
+    for assignment_id, position, graded, grade in rows:
+        grades[(assignment_id, position)] = grade
+        counts[assignment_id] = graded
+    return {
+        assignment_id: {
+            f'p{p}': grades.get((assignment_id, _rank_position(count, p))) for p in GRADE_PERCENTILES
+        }
+        for assignment_id, count in counts.items()
+    }
+
+
+# the O(1) part of an assignment's gradebook, straight from its AssignmentStats row
+def summarize_stats(stats):
+    submitted = stats.submitted_count if stats else 0
+    graded = stats.graded_count if stats else 0
+    late = stats.late_count if stats else 0
+    return {
+        'submitted': submitted,
+        'graded': graded,
+        'ungraded': submitted - graded,
+        'late': late,
+        'mean_grade': round(stats.grade_sum / graded, 2) if graded else None,
+        'mean_seconds_late': round(stats.lateness_sum / late, 1) if late else None
+    }
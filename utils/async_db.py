@@ -0,0 +1,42 @@
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from config import engine_options
+
+# sync driver -> asyncio driver for the same database
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite'
+}
+
+
+def async_database_uri(uri):
+    url = make_url(uri)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'No asyncio driver configured for {backend}')
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+# asyncio counterpart of the Flask-SQLAlchemy `db` for the async read tier. The models in models.py
+# are plain mapped classes, so select(Model) statements run unchanged on this engine; lazy loading is
+# not available under asyncio, every relationship a response dumps has to be eager loaded.
+class AsyncDatabase:
+    def __init__(self):
+        self.engine = None
+
+    def init_app(self, config):
+        uri = config.get('ASYNC_SQLALCHEMY_DATABASE_URI') or async_database_uri(config['SQLALCHEMY_DATABASE_URI'])
+        self.engine = create_async_engine(uri, **engine_options(
+            uri,
+            config.get('ASYNC_POSTGRES_ENGINE_OPTIONS', {}),
+            config.get('ASYNC_SQLALCHEMY_ENGINE_OPTIONS', {})
+        ))
+
+    def session(self):
+        return AsyncSession(self.engine, expire_on_commit=False)
+
+    async def dispose(self):
+        await self.engine.dispose()
+
+
+async_db = AsyncDatabase()
@@ -0,0 +1,105 @@
+import time
+from collections import OrderedDict
+from functools import wraps
+from threading import Lock
+from flask import current_app, jsonify
+from flask_jwt_extended import verify_jwt_in_request, get_jwt, get_jwt_identity
+from sqlalchemy.orm import make_transient_to_detached
+from models import db, User
+
+
+# role check straight from the verified token claims, login puts 'role' in additional_claims
+def require_role(*roles):
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            verify_jwt_in_request()
+            if get_jwt().get('role') not in roles:
+                return jsonify({
+                    'status': 'error',
+                    'message': 'Unauthorized access'
+                }), 403
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# identity is stored as a string in the token, the models use integer ids
+def get_current_user_id():
+    return int(get_jwt_identity())
+
+
+# The token's User row, for the views that need more than the id and role claims. There is no
+# global user loader, so role checks never touch the User table; None when the user is gone.
+def load_current_user():
+    return identity_cache.load(get_jwt_identity())
+
+
+# Short-lived cache of user rows so views loading the current user skip the primary-key SELECT.
+# It holds id, username and role only: a password hash cached here would keep verifying the old
+# password on other workers for up to IDENTITY_CACHE_TTL after a reset, so anything checking a
+# password loads the row itself.
+class IdentityCache:
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, row = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return row
+
+    def set(self, user_id, row, ttl):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + ttl, row)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(int(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    # returns a session-bound User, loading from the database only on a miss
+    def load(self, user_id):
+        user_id = int(user_id)
+        ttl = current_app.config.get('IDENTITY_CACHE_TTL', 0)
+        if ttl <= 0:
+            return db.session.get(User, user_id)
+
+        row = self.get(user_id)
+        if row is None:
+            user = db.session.get(User, user_id)
+            if user is None:
+                return None
+            self.set(user_id, {
+                'id': user.id,
+                'username': user.username,
+                'role': user.role
+            }, ttl)
+            return user
+
+        # rebuild a persistent instance from the cached columns without touching the database. It
+        # bypasses User.__init__, which takes a password: that column is left unloaded, so reading
+        # it SELECTs the current hash
+        user = User.__mapper__.class_manager.new_instance()
+        user.id = row['id']
+        user.username = row['username']
+        user.role = row['role']
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
+
+identity_cache = IdentityCache()
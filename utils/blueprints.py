@@ -0,0 +1,32 @@
+from importlib import import_module
+from threading import Lock
+
+
+# Imports and registers blueprints on the first request instead of in create_app, so a worker (or
+# anything importing app.py) does not pay for the route modules and the schemas they build until it
+# serves. It wraps app.wsgi_app and registers before Flask handles that first request, which is the
+# last point Flask allows it. `names` are 'module.attribute' paths; load() registers them right away,
+# e.g. for CLI commands that read the URL map.
+class LazyBlueprints:
+    def __init__(self, app, names):
+        self.app = app
+        self.names = names
+        self.loaded = False
+        self._lock = Lock()
+        self._wsgi_app = app.wsgi_app
+        app.wsgi_app = self
+        app.extensions['lazy_blueprints'] = self
+
+    def load(self):
+        with self._lock:
+            if self.loaded:
+                return
+            for name in self.names:
+                module_name, _, attribute = name.rpartition('.')
+                self.app.register_blueprint(getattr(import_module(module_name), attribute))
+            self.loaded = True
+
+    def __call__(self, environ, start_response):
+        if not self.loaded:
+            self.load()
+        return self._wsgi_app(environ, start_response)
@@ -0,0 +1,125 @@
+import time
+from collections import OrderedDict
+from functools import wraps
+from importlib import import_module
+from threading import Lock
+from flask import current_app, g, make_response, request
+from utils.auth import get_current_user_id
+from utils.compression import response_compression
+
+
+# In-process LRU with per-entry TTL and a size bound. A shared store (e.g. Redis) can replace
+# it by implementing the same get/set/incr/get_counters methods, see RESPONSE_CACHE_BACKEND.
+class LocalCacheBackend:
+    def __init__(self, max_entries=5000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # generation counters live outside the LRU, evicting one would resurrect stale entries
+        self._counters = {}
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+
+    def get_counters(self, keys):
+        with self._lock:
+            return [self._counters.get(key, 0) for key in keys]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+
+# Caches whole JSON responses per user. Every entry is keyed on the current generation of the
+# scopes it was built from, so a write only has to bump a scope to retire exactly those entries.
+# Generations are per process with the local backend; below `conditional` the key also carries
+# the ETag computed from the database, so a write made by another process misses here as well.
+class ResponseCache:
+    def __init__(self):
+        self.backend = None
+        self.default_ttl = 60
+
+    def init_app(self, app):
+        self.default_ttl = app.config.get('RESPONSE_CACHE_TTL', 60)
+        backend = app.config.get('RESPONSE_CACHE_BACKEND', 'local')
+        if backend == 'local':
+            self.backend = LocalCacheBackend(app.config.get('RESPONSE_CACHE_MAX_ENTRIES', 5000))
+        else:
+            module_name, _, class_name = backend.rpartition('.')
+            self.backend = getattr(import_module(module_name), class_name)(app)
+        app.extensions['response_cache'] = self
+
+    # scopes are format strings filled with the caller's user_id and the view arguments
+    def cached(self, *scopes, ttl=None):
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if self.backend is None or self.default_ttl <= 0:
+                    return fn(*args, **kwargs)
+
+                user_id = get_current_user_id()
+                scope_keys = [scope.format(user_id=user_id, **kwargs) for scope in scopes]
+                generations = self.backend.get_counters(scope_keys)
+                key = '|'.join([
+                    request.endpoint,
+                    str(user_id),
+                    request.query_string.decode(),
+                    ','.join(str(generation) for generation in generations),
+                    g.get('etag', '')
+                ])
+
+                hit = self.backend.get(key)
+                if hit is not None:
+                    body, mimetype, precompressed = hit
+                    response = current_app.response_class(body, status=200, mimetype=mimetype)
+                    response.precompressed = precompressed
+                    response.headers['X-Cache'] = 'HIT'
+                    return response
+
+                response = make_response(fn(*args, **kwargs))
+                if response.status_code == 200:
+                    # the entry keeps the body compressed in every encoding the app serves, so
+                    # a hit sends stored bytes whichever encoding its client accepts
+                    body = response.get_data()
+                    precompressed = {}
+                    if response_compression.compressible(response) and len(body) >= response_compression.min_size:
+                        precompressed = {
+                            encoding: response_compression.compress(body, encoding)
+                            for encoding in response_compression.encodings
+                        }
+                    self.backend.set(key, (body, response.mimetype, precompressed), ttl or self.default_ttl)
+                    response.precompressed = precompressed
+                    response.headers['X-Cache'] = 'MISS'
+                return response
+            return wrapper
+        return decorator
+
+    def invalidate(self, *scope_keys):
+        if self.backend is None:
+            return
+        for scope_key in scope_keys:
+            self.backend.incr(scope_key)
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,83 @@
+import gzip
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/csv', 'text/plain', 'text/html'}
+
+
+# Compresses response bodies for clients that send Accept-Encoding: br when the brotli package
+# is installed, otherwise gzip. Bodies under COMPRESSION_MIN_SIZE, streamed responses and views
+# marked with `exempt` go out as they are. A response can carry `precompressed`, a dict of
+# encoding -> bytes (the response cache keeps them per entry), to skip compressing the same body again.
+class ResponseCompression:
+    def __init__(self):
+        self.enabled = False
+        self.min_size = 1024
+        self.gzip_level = 6
+        self.brotli_quality = 5
+
+    def init_app(self, app):
+        self.enabled = app.config.get('COMPRESSION_ENABLED', True)
+        self.min_size = app.config.get('COMPRESSION_MIN_SIZE', 1024)
+        self.gzip_level = app.config.get('COMPRESSION_GZIP_LEVEL', 6)
+        self.brotli_quality = app.config.get('COMPRESSION_BROTLI_QUALITY', 5)
+        if self.enabled:
+            app.after_request(self._compress_response)
+        app.extensions['response_compression'] = self
+
+    @property
+    def encodings(self):
+        return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    # per-route opt-out, e.g. for responses that mix secrets with request input (BREACH)
+    @staticmethod
+    def exempt(fn):
+        fn.compress = False
+        return fn
+
+    # whether this response would be compressed for a client accepting one of `encodings`
+    def compressible(self, response):
+        if not self.enabled or response.status_code != 200 or response.is_streamed:
+            return False
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES or 'Content-Encoding' in response.headers:
+            return False
+        view = current_app.view_functions.get(request.endpoint)
+        if not getattr(view, 'compress', True):
+            return False
+        return response.content_length is None or response.content_length >= self.min_size
+
+    # the encoding this response should go out in for the current request, or None
+    def negotiate(self, response):
+        if not self.compressible(response):
+            return None
+        return request.accept_encodings.best_match(self.encodings)
+
+    def compress(self, data, encoding):
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        # mtime=0 keeps the output identical for identical input
+        return gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
+
+    def _compress_response(self, response):
+        if response.mimetype in COMPRESSIBLE_MIMETYPES:
+            response.vary.add('Accept-Encoding')
+        encoding = self.negotiate(response)
+        if encoding is None:
+            return response
+
+        data = getattr(response, 'precompressed', {}).get(encoding)
+        if data is None:
+            body = response.get_data()
+            if len(body) < self.min_size:
+                return response
+            data = self.compress(body, encoding)
+        response.set_data(data)
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+
+response_compression = ResponseCompression()
@@ -0,0 +1,83 @@
+from functools import lru_cache
+from flask import request
+from marshmallow.fields import Nested
+from sqlalchemy import Text, inspect
+from sqlalchemy.orm import defer, joinedload, selectinload
+from utils.pagination import InvalidQueryParam
+
+
+def _split_arg(args, name):
+    raw = args.get(name)
+    if not raw:
+        return ()
+    return tuple(dict.fromkeys(f.strip() for f in raw.split(',') if f.strip()))
+
+
+# building a schema is not free, so each (fields, many) variant is created once and reused
+@lru_cache(maxsize=256)
+def _build_schema(schema_cls, only, many):
+    return schema_cls(only=only, many=many)
+
+
+# The names ?fields= and ?include= may ask for: whatever a full instance of the schema dumps,
+# so load_only fields (e.g. the password hash) can never be selected. (columns, nested) sets.
+@lru_cache(maxsize=64)
+def _selectable_fields(schema_cls):
+    dump_fields = schema_cls().dump_fields
+    nested = frozenset(name for name, field in dump_fields.items() if isinstance(field, Nested))
+    return frozenset(dump_fields) - nested, nested
+
+
+# Sparse fieldsets: ?fields= picks the columns, ?include= adds nested relationships.
+# `default_schema` is the summary instance returned when neither is given. `args` defaults to
+# the Flask request's query string.
+def requested_schema(default_schema, args=None):
+    args = request.args if args is None else args
+    fields = _split_arg(args, 'fields')
+    include = _split_arg(args, 'include')
+    if not fields and not include:
+        return default_schema
+
+    schema_cls = type(default_schema)
+    columns, nested = _selectable_fields(schema_cls)
+
+    unknown = [f for f in fields if f not in columns]
+    if unknown:
+        raise InvalidQueryParam(f'Unknown fields: {", ".join(unknown)}')
+    unknown = [f for f in include if f not in nested]
+    if unknown:
+        raise InvalidQueryParam(f'Unknown include: {", ".join(unknown)}')
+
+    only = set(fields or default_schema.only) | set(include)
+    return _build_schema(schema_cls, tuple(sorted(only)), default_schema.many)
+
+
+# Loader options matching what a schema will dump. Nested fields are eager loaded so a list costs
+# one query per relationship instead of one per row (joinedload for many-to-one, selectinload for
+# collections), and large text columns the schema does not dump are deferred.
+@lru_cache(maxsize=256)
+def loader_options(schema):
+    return tuple(_loader_options(schema))
+
+
+def _loader_options(schema):
+    mapper = inspect(schema.opts.model)
+    options = [
+        defer(column_attr.class_attribute)
+        for column_attr in mapper.column_attrs
+        if column_attr.key not in schema.dump_fields and isinstance(column_attr.columns[0].type, Text)
+    ]
+    for name, field in schema.dump_fields.items():
+        if not isinstance(field, Nested):
+            continue
+        relationship = mapper.relationships.get(field.attribute or name)
+        # dynamic relationships are queries, they cannot be eager loaded
+        if relationship is None or relationship.lazy == 'dynamic':
+            continue
+        strategy = selectinload if relationship.uselist else joinedload
+        option = strategy(relationship.class_attribute)
+        children = _loader_options(field.schema)
+        if children:
+            option = option.options(*children)
+        options.append(option)
+    return options
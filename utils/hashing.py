@@ -0,0 +1,59 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from threading import BoundedSemaphore, Lock
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# name -> (pid, executor, semaphore, worker count); login traffic and bulk imports get separate pools
+_pools = {}
+_pools_lock = Lock()
+
+
+# raised when the auth pool already has its maximum number of queued hashes
+class PasswordHashingBusy(Exception):
+    pass
+
+
+# Password hashing is CPU-bound, so it runs in worker processes instead of request threads.
+# Pools are created lazily and per process, a pool inherited through fork is unusable.
+def get_pool(name='auth'):
+    with _pools_lock:
+        entry = _pools.get(name)
+        if entry is None or entry[0] != os.getpid():
+            workers = current_app.config.get('PASSWORD_HASH_WORKERS') or os.cpu_count() or 1
+            max_pending = current_app.config.get('PASSWORD_HASH_MAX_PENDING') or workers * 4
+            entry = (os.getpid(), ProcessPoolExecutor(max_workers=workers), BoundedSemaphore(max_pending), workers)
+            _pools[name] = entry
+        return entry[1:]
+
+
+# runs fn on the auth pool, refusing immediately instead of queueing behind a login storm
+def _run_bounded(fn, *args):
+    pool, slots, _ = get_pool('auth')
+    if not slots.acquire(blocking=False):
+        raise PasswordHashingBusy('Server is busy, please try again shortly')
+    try:
+        future = pool.submit(fn, *args)
+    except Exception:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    try:
+        return future.result(timeout=current_app.config.get('PASSWORD_HASH_TIMEOUT'))
+    except TimeoutError:
+        future.cancel()
+        raise PasswordHashingBusy('Server is busy, please try again shortly')
+
+
+def check_password(pwhash, password):
+    return _run_bounded(check_password_hash, pwhash, password)
+
+
+def hash_password(password):
+    return _run_bounded(generate_password_hash, password)
+
+
+def hash_passwords(passwords):
+    pool, _, workers = get_pool('bulk')
+    chunksize = max(1, len(passwords) // (workers * 4))
+    return list(pool.map(generate_password_hash, passwords, chunksize=chunksize))
@@ -0,0 +1,168 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from threading import Lock
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# upper bounds (ms) of the request duration histogram buckets, the last bucket is open ended
+DURATION_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+# statements kept per request for the slow request log
+MAX_TRACED_STATEMENTS = 100
+
+
+# per-request timings for the request being served, kept on flask.g
+class RequestTimings:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db_time = 0.0
+        self.queries = 0
+        self.statements = []
+        self.serialize_time = 0.0
+        self.serialize_depth = 0
+
+
+def current_timings():
+    if not has_request_context():
+        return None
+    return g.get('request_timings')
+
+
+# Wall, DB and serialization time per request. Results go out as a Server-Timing header and into
+# per-endpoint histograms served by the admin metrics endpoint; slow requests are logged with the
+# SQL they ran. Aggregates are per process.
+class RequestMetrics:
+    def __init__(self):
+        self._lock = Lock()
+        self._endpoints = {}
+        self._engine_hooked = False
+        self.slow_request_ms = 0
+
+    def init_app(self, app):
+        if not app.config.get('REQUEST_METRICS_ENABLED', True):
+            return
+        self.slow_request_ms = app.config.get('SLOW_REQUEST_MS', 0)
+        if not self._engine_hooked:
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+            self._engine_hooked = True
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.extensions['request_metrics'] = self
+
+    def _start_request(self):
+        g.request_timings = RequestTimings()
+
+    def _finish_request(self, response):
+        timings = current_timings()
+        if timings is None:
+            return response
+        total = (time.perf_counter() - timings.start) * 1000
+        db_ms = timings.db_time * 1000
+        serialize_ms = timings.serialize_time * 1000
+
+        response.headers.add('Server-Timing', ', '.join([
+            f'db;dur={db_ms:.1f};desc="{timings.queries} queries"',
+            f'serialize;dur={serialize_ms:.1f}',
+            f'total;dur={total:.1f}'
+        ]))
+
+        endpoint = request.endpoint or 'unmatched'
+        self.record(endpoint, response.status_code, total, db_ms, timings.queries, serialize_ms)
+
+        if self.slow_request_ms and total >= self.slow_request_ms:
+            current_app.logger.warning(
+                'Slow request %s %s: %.1fms total, %.1fms in %d queries, %.1fms serializing\n%s',
+                request.method, request.full_path.rstrip('?'), total, db_ms, timings.queries, serialize_ms,
+                '\n'.join(f'  {duration * 1000:8.1f}ms  {statement}' for statement, duration in timings.statements)
+            )
+        return response
+
+    def record(self, endpoint, status_code, total_ms, db_ms, queries, serialize_ms):
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = {
+                    'count': 0,
+                    'errors': 0,
+                    'buckets': [0] * (len(DURATION_BUCKETS_MS) + 1),
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'db_ms': 0.0,
+                    'queries': 0,
+                    'max_queries': 0,
+                    'serialize_ms': 0.0
+                }
+            stats['count'] += 1
+            if status_code >= 500:
+                stats['errors'] += 1
+            stats['buckets'][bisect_left(DURATION_BUCKETS_MS, total_ms)] += 1
+            stats['total_ms'] += total_ms
+            stats['max_ms'] = max(stats['max_ms'], total_ms)
+            stats['db_ms'] += db_ms
+            stats['queries'] += queries
+            stats['max_queries'] = max(stats['max_queries'], queries)
+            stats['serialize_ms'] += serialize_ms
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def snapshot(self):
+        with self._lock:
+            endpoints = {name: dict(stats, buckets=list(stats['buckets'])) for name, stats in self._endpoints.items()}
+
+        bounds = [str(bound) for bound in DURATION_BUCKETS_MS] + ['+Inf']
+        # bucket counts are not cumulative, `le` is each bucket's upper bound
+        data = {}
+        for name, stats in sorted(endpoints.items()):
+            count = stats['count']
+            data[name] = {
+                'count': count,
+                'errors': stats['errors'],
+                'histogram_ms': [{'le': bound, 'count': n} for bound, n in zip(bounds, stats['buckets'])],
+                'avg_ms': round(stats['total_ms'] / count, 3),
+                'max_ms': round(stats['max_ms'], 3),
+                'avg_db_ms': round(stats['db_ms'] / count, 3),
+                'avg_queries': round(stats['queries'] / count, 2),
+                'max_queries': stats['max_queries'],
+                'avg_serialize_ms': round(stats['serialize_ms'] / count, 3)
+            }
+        return data
+
+    # times a marshmallow dump; nested dumps run inside the outer one and are not counted twice
+    @contextmanager
+    def serializing(self):
+        timings = current_timings()
+        if timings is None:
+            yield
+            return
+        timings.serialize_depth += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            timings.serialize_depth -= 1
+            if timings.serialize_depth == 0:
+                timings.serialize_time += time.perf_counter() - start
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_timings() is not None:
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timings = current_timings()
+    starts = conn.info.get('query_start')
+    if timings is None or not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+    timings.db_time += duration
+    timings.queries += 1
+    if len(timings.statements) < MAX_TRACED_STATEMENTS:
+        timings.statements.append((statement, duration))
+
+
+request_metrics = RequestMetrics()
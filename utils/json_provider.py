@@ -0,0 +1,31 @@
+import json
+from flask.json.provider import DefaultJSONProvider
+
+
+# Flask's default provider builds a json.JSONEncoder for every dumps call; this one keeps one per
+# option set and calls its encode directly, which stays on the C encoder. Output is the same bytes
+# as DefaultJSONProvider's: the encoder uses its `default`, so e.g. a raw date is still an HTTP date
+# (the schemas dump dates as ISO 8601 strings before they get here).
+class FastJSONProvider(DefaultJSONProvider):
+    def __init__(self, app):
+        super().__init__(app)
+        self._encoders = {}
+
+    def _encoder(self, indent, separators):
+        key = (self.ensure_ascii, self.sort_keys, indent, separators)
+        encoder = self._encoders.get(key)
+        if encoder is None:
+            encoder = self._encoders[key] = json.JSONEncoder(
+                default=self.default,
+                ensure_ascii=self.ensure_ascii,
+                sort_keys=self.sort_keys,
+                indent=indent,
+                separators=separators
+            )
+        return encoder
+
+    def dumps(self, obj, **kwargs):
+        # jsonify passes indent or separators only, anything else takes the json.dumps path
+        if kwargs.keys() - {'indent', 'separators'}:
+            return super().dumps(obj, **kwargs)
+        return self._encoder(kwargs.get('indent'), kwargs.get('separators')).encode(obj)
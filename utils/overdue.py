@@ -0,0 +1,91 @@
+import time
+from datetime import datetime
+from threading import Event, Thread
+from sqlalchemy import exists, select, update
+from models import db, Assignment, Submission
+from utils.cache import response_cache
+
+
+# Marks assignments given to one student that are past their due date and that the student has
+# not submitted as 'overdue'. Open assignments (no student_id) are shared by every student, one
+# status cannot say who is late, so they are left alone; lateness is in Submission.seconds_late.
+# Each batch is one UPDATE over the ids picked through ix_assignment_pending_due_date and commits on
+# its own, so row locks are held for one short statement at a time; on Postgres the pick skips rows
+# a user write has locked, the next sweep gets them. Returns the number of assignments marked.
+#
+# response_cache.invalidate only reaches this process's cache. Other processes (every web worker
+# when this runs as `flask sweep-overdue`) notice through the ETag their cached list responses are
+# keyed on, which changes with the updated_on set here.
+def sweep_overdue(batch_size=1000, pause=0.0, now=None, log=None):
+    now = now or datetime.utcnow()
+    due = (
+        Assignment.status == 'pending',
+        Assignment.due_date < now,
+        Assignment.student_id.isnot(None),
+        ~exists().where(Submission.assignment_id == Assignment.id, Submission.student_id == Assignment.student_id)
+    )
+    batch = select(Assignment.id).where(*due).order_by(Assignment.due_date).limit(batch_size) \
+        .with_for_update(skip_locked=True).scalar_subquery()
+    statement = update(Assignment).where(Assignment.id.in_(batch), *due).values(
+        status='overdue',
+        updated_on=now
+    ).returning(Assignment.instructor_id, Assignment.student_id).execution_options(synchronize_session=False)
+
+    total = 0
+    while True:
+        try:
+            rows = db.session.execute(statement).all()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        total += len(rows)
+        if rows:
+            scopes = {f'instructor:{instructor_id}:assignments' for instructor_id, _ in rows}
+            scopes.update(f'student:{student_id}:assignments' for _, student_id in rows)
+            response_cache.invalidate(*scopes)
+            if log:
+                log(f'Marked {len(rows)} assignments overdue ({total} so far)')
+        if len(rows) < batch_size:
+            return total
+        if pause:
+            time.sleep(pause)
+
+
+# In-process periodic sweep for deployments without cron: a daemon thread running sweep_overdue
+# every OVERDUE_SWEEP_INTERVAL seconds. Concurrent sweeps from several workers are safe, each
+# batch skips the rows another one holds.
+class OverdueScheduler:
+    def __init__(self):
+        self._stop = Event()
+        self._thread = None
+
+    def init_app(self, app):
+        interval = app.config.get('OVERDUE_SWEEP_INTERVAL', 0)
+        if interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self._run, args=(app, interval), name='overdue-sweep', daemon=True)
+        self._thread.start()
+        app.extensions['overdue_scheduler'] = self
+
+    def _run(self, app, interval):
+        while not self._stop.wait(interval):
+            with app.app_context():
+                try:
+                    sweep_overdue(
+                        batch_size=app.config.get('OVERDUE_SWEEP_BATCH_SIZE', 1000),
+                        pause=app.config.get('OVERDUE_SWEEP_PAUSE', 0.0)
+                    )
+                except Exception:
+                    app.logger.exception('Overdue sweep failed')
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+overdue_scheduler = OverdueScheduler()
@@ -0,0 +1,127 @@
+import base64
+import json
+from datetime import datetime
+from flask import request
+from sqlalchemy import and_, or_
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+# raised for malformed list query parameters, routes answer these with a 400
+class InvalidQueryParam(ValueError):
+    pass
+
+
+# the helpers below read the Flask request's query string unless `args` is passed explicitly
+def get_limit(args=None):
+    args = request.args if args is None else args
+    raw = args.get('limit', DEFAULT_LIMIT)
+    try:
+        limit = int(raw)
+    except (TypeError, ValueError):
+        raise InvalidQueryParam('limit must be an integer')
+    if limit < 1:
+        raise InvalidQueryParam('limit must be positive')
+    return min(limit, MAX_LIMIT)
+
+
+def get_int_arg(name, args=None):
+    args = request.args if args is None else args
+    value = args.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise InvalidQueryParam(f'{name} must be an integer')
+
+
+def get_datetime_arg(name, args=None):
+    args = request.args if args is None else args
+    value = args.get(name)
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise InvalidQueryParam(f'{name} must be an ISO 8601 datetime')
+
+
+# ?due_after=&due_before= range on a datetime column
+def filter_due_range(query, column, args=None):
+    due_after = get_datetime_arg('due_after', args)
+    due_before = get_datetime_arg('due_before', args)
+    if due_after is not None:
+        query = query.filter(column >= due_after)
+    if due_before is not None:
+        query = query.filter(column < due_before)
+    return query
+
+
+def encode_cursor(sort, value, row_id):
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([sort, value, row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, sort, column):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        cursor_sort, value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        if column.type.python_type is datetime:
+            value = datetime.fromisoformat(value)
+        row_id = int(row_id)
+    except (ValueError, TypeError):
+        raise InvalidQueryParam('Invalid cursor')
+    if cursor_sort != sort:
+        raise InvalidQueryParam('Cursor does not match sort order')
+    return value, row_id
+
+
+# Keyset pagination: rows are ordered by (sort column, id) and the cursor carries the
+# last row's pair, so every page is an index range scan no matter how deep it is.
+# `sortable` maps the ?sort= names to non-nullable columns of `model`.
+def keyset_paginate(query, model, sortable, default_sort='id'):
+    query, page = keyset_query(query, model, sortable, default_sort)
+    return keyset_result(query.all(), page)
+
+
+# The two halves of keyset_paginate for callers that execute the statement themselves (the async
+# tier). `query` may be a Query or a select(); keyset_query applies the cursor, order and limit and
+# keyset_result trims the extra row into the next cursor.
+def keyset_query(query, model, sortable, default_sort='id', args=None):
+    args = request.args if args is None else args
+    sort = args.get('sort', default_sort)
+    descending = sort.startswith('-')
+    name = sort.lstrip('-')
+    if name not in sortable:
+        raise InvalidQueryParam(f'sort must be one of: {", ".join(sorted(sortable))}')
+    column = sortable[name]
+    limit = get_limit(args)
+
+    token = args.get('cursor')
+    if token:
+        value, last_id = decode_cursor(token, sort, column)
+        if name == 'id':
+            after = model.id < last_id if descending else model.id > last_id
+        elif descending:
+            after = or_(column < value, and_(column == value, model.id < last_id))
+        else:
+            after = or_(column > value, and_(column == value, model.id > last_id))
+        query = query.filter(after)
+
+    order = [column] if name == 'id' else [column, model.id]
+    order = [c.desc() if descending else c.asc() for c in order]
+    return query.order_by(*order).limit(limit + 1), (sort, column, limit)
+
+
+def keyset_result(rows, page):
+    sort, column, limit = page
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort, getattr(last, column.key), last.id)
+    return rows, next_cursor
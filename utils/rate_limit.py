@@ -0,0 +1,133 @@
+import math
+import time
+from collections import OrderedDict
+from functools import wraps
+from importlib import import_module
+from threading import Lock
+from flask import jsonify, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+
+
+# Sliding-window counters in process memory: each key keeps the count of the current fixed window
+# and the previous one, weighted by how much of the previous window still overlaps, plus the time
+# of the first request counted in the current window. Keys are kept in
+# an LRU so a flood of addresses cannot grow it without bound. A shared store (e.g. Redis) can
+# replace it by implementing the same hit method, see RATE_LIMIT_BACKEND.
+class LocalRateLimitBackend:
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    # counts one request against `limit` per `window` seconds; returns (allowed, retry_after seconds).
+    # Rejected requests are not counted, so a client that waits gets back in.
+    def hit(self, key, limit, window):
+        now = time.time()
+        start = now - now % window
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < start - window:
+                current, previous, first = 0, 0, None
+            elif entry[0] < start:
+                current, previous, first = 0, entry[1], None
+            else:
+                current, previous, first = entry[1], entry[2], entry[3]
+
+            elapsed = now - start
+            allowed = previous * (1 - elapsed / window) + current < limit
+            if allowed:
+                current += 1
+                if first is None:
+                    first = now
+            self._entries[key] = (start, current, previous, first)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+
+        if allowed:
+            return True, 0
+        if current >= limit or not previous:
+            # the current window alone is full: until its oldest counted request is a window old
+            retry_after = first + window - now
+        else:
+            # until enough of the previous window has slid out
+            retry_after = window * (1 - (limit - current) / previous) - elapsed
+        return False, max(1, math.ceil(retry_after))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# who a request counts against; None skips the rule (e.g. a login body without a username)
+def _client_ip():
+    return request.remote_addr
+
+
+def _username():
+    data = request.get_json(silent=True)
+    username = data.get('username') if isinstance(data, dict) else None
+    return username[:200] if isinstance(username, str) and username else None
+
+
+# the limiter runs before require_role, so it checks the token itself; a request without a valid
+# token skips the rule and is turned away by the auth check behind it
+def _identity():
+    try:
+        verify_jwt_in_request()
+    except (JWTExtendedException, PyJWTError):
+        return None
+    return get_jwt_identity()
+
+
+KEY_FUNCTIONS = {
+    'ip': _client_ip,
+    'username': _username,
+    'identity': _identity
+}
+
+
+# Per-route quotas from RATE_LIMITS, checked before the view runs so an over-limit request is
+# answered with a 429 before any password hashing or database work. The decorator goes right below
+# the route, above require_role/jwt_required, so throttled requests skip the auth checks too.
+class RateLimiter:
+    def __init__(self):
+        self.backend = None
+        self.limits = {}
+
+    def init_app(self, app):
+        self.limits = app.config.get('RATE_LIMITS', {})
+        if not app.config.get('RATE_LIMIT_ENABLED', True):
+            self.backend = None
+        else:
+            backend = app.config.get('RATE_LIMIT_BACKEND', 'local')
+            if backend == 'local':
+                self.backend = LocalRateLimitBackend(app.config.get('RATE_LIMIT_MAX_KEYS', 100000))
+            else:
+                module_name, _, class_name = backend.rpartition('.')
+                self.backend = getattr(import_module(module_name), class_name)(app)
+        app.extensions['rate_limiter'] = self
+
+    def limit(self, name):
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if self.backend is not None:
+                    for kind, (limit, window) in self.limits.get(name, {}).items():
+                        value = KEY_FUNCTIONS[kind]()
+                        if value is None:
+                            continue
+                        allowed, retry_after = self.backend.hit(f'{name}:{kind}:{value}', limit, window)
+                        if not allowed:
+                            return jsonify({
+                                'status': 'error',
+                                'message': 'Too many requests, please try again later'
+                            }), 429, {'Retry-After': str(retry_after)}
+                return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,200 @@
+import hashlib
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+from sqlalchemy import delete, select
+from models import db, RevokedToken, UserTokenCutoff
+
+# rows are re-read this far behind the newest revoked_on seen, so revocations committed late or
+# stamped by a worker with a lagging clock are still picked up
+SYNC_OVERLAP = timedelta(minutes=5)
+
+
+# Fixed-size Bloom filter over strings: k bit positions per item from one blake2b digest
+# (double hashing). No false negatives; false positives at about `error_rate` up to `capacity` items.
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+# In-process copy of the revoked_token and user_token_cutoff tables. A jti is checked against the
+# Bloom filter first and only a filter hit looks in the exact set, so a live token costs a few bit
+# probes and a dict lookup for its user's cutoff. New rows are read at most every `sync_seconds`,
+# which bounds how long a token revoked through another worker keeps working here; revocations
+# made by this process apply immediately.
+#
+# A row outlives its purpose once every token it rejects has expired (a token is revoked or cut off
+# after it was issued), so with a finite JWT_ACCESS_TOKEN_EXPIRES the first sync only loads rows
+# newer than that, and every TOKEN_DENYLIST_PRUNE_SECONDS a sync deletes the older rows from both
+# tables and drops them from memory, rebuilding the Bloom filter from what is left.
+class TokenDenylist:
+    def __init__(self):
+        self._lock = Lock()
+        self.configure({})
+
+    def configure(self, config):
+        with self._lock:
+            self.sync_seconds = config.get('TOKEN_DENYLIST_SYNC_SECONDS', 2)
+            self.capacity = config.get('TOKEN_DENYLIST_CAPACITY', 100000)
+            self.error_rate = config.get('TOKEN_DENYLIST_ERROR_RATE', 0.001)
+            self.prune_seconds = config.get('TOKEN_DENYLIST_PRUNE_SECONDS', 3600)
+            # None when tokens never expire, then nothing is ever pruned
+            expires = config.get('JWT_ACCESS_TOKEN_EXPIRES', False)
+            self.retention = expires if isinstance(expires, timedelta) else None
+            # jti -> revoked_on
+            self._jtis = {}
+            self._bloom = BloomFilter(self.capacity, self.error_rate)
+            self._watermark = None
+            # user id -> epoch seconds (fractional); tokens with an iat before it are revoked
+            self._cutoffs = {}
+            self._cutoff_watermark = None
+            self._next_sync = 0.0
+            self._next_prune = 0.0
+            self._syncing = False
+
+    def init_app(self, app):
+        self.configure(app.config)
+        app.extensions['token_denylist'] = self
+
+    # tokens without a jti were not issued by login and cannot be revoked
+    def contains(self, jti):
+        return jti is not None and jti in self._bloom and jti in self._jtis
+
+    def add(self, jti):
+        with self._lock:
+            self._add(jti, datetime.utcnow())
+
+    # login stamps iat with sub-second precision, so a token issued just after the cutoff, even in
+    # the same second, is accepted
+    def cut_off(self, user_id, not_before):
+        with self._lock:
+            self._cut_off(user_id, not_before)
+
+    def _cut_off(self, user_id, not_before):
+        cutoff = not_before.replace(tzinfo=timezone.utc).timestamp()
+        self._cutoffs[user_id] = max(cutoff, self._cutoffs.get(user_id, cutoff))
+
+    # memory-only check of verified token claims
+    def revoked(self, claims):
+        if self.contains(claims.get('jti')):
+            return True
+        cutoff = self._cutoffs.get(_user_id(claims.get('sub')))
+        return cutoff is not None and (claims.get('iat') or 0) < cutoff
+
+    def _add(self, jti, revoked_on):
+        if jti in self._jtis:
+            return
+        self._jtis[jti] = revoked_on
+        if len(self._jtis) > self._bloom.capacity:
+            # past capacity the false positive rate climbs, rebuild at twice the size
+            self._rebuild(self._bloom.capacity * 2)
+        else:
+            self._bloom.add(jti)
+
+    def _rebuild(self, capacity):
+        self._bloom = BloomFilter(capacity, self.error_rate)
+        for item in self._jtis:
+            self._bloom.add(item)
+
+    # drops what was revoked or cut off before `horizon`, back to the configured filter size
+    # unless more than that is still live
+    def _prune(self, horizon):
+        self._jtis = {jti: revoked_on for jti, revoked_on in self._jtis.items() if revoked_on >= horizon}
+        oldest = horizon.replace(tzinfo=timezone.utc).timestamp()
+        self._cutoffs = {user_id: cutoff for user_id, cutoff in self._cutoffs.items() if cutoff >= oldest}
+        capacity = self.capacity
+        while capacity < len(self._jtis):
+            capacity *= 2
+        self._rebuild(capacity)
+
+    # True for the one caller that should run sync() now; concurrent callers keep using the
+    # current copy instead of waiting on it. The caller must call release_sync() afterwards,
+    # in a finally so a failed connect does not stop this worker from ever syncing again.
+    def claim_sync(self):
+        with self._lock:
+            if self._syncing or time.monotonic() < self._next_sync:
+                return False
+            self._syncing = True
+            return True
+
+    # a failed sync is retried after sync_seconds as well, not on every request
+    def release_sync(self):
+        with self._lock:
+            self._next_sync = time.monotonic() + self.sync_seconds
+            self._syncing = False
+
+    # Reads the rows added since the last sync over a plain (sync) Connection and, when a prune is
+    # due, deletes the expired ones. `horizon` keeps SYNC_OVERLAP of slack for workers' clocks.
+    def sync(self, connection):
+        horizon = datetime.utcnow() - self.retention - SYNC_OVERLAP if self.retention else None
+        query = select(RevokedToken.jti, RevokedToken.revoked_on)
+        if self._watermark is not None:
+            query = query.where(RevokedToken.revoked_on >= self._watermark - SYNC_OVERLAP)
+        elif horizon is not None:
+            query = query.where(RevokedToken.revoked_on >= horizon)
+        rows = connection.execute(query).all()
+        query = select(UserTokenCutoff.user_id, UserTokenCutoff.not_before)
+        if self._cutoff_watermark is not None:
+            query = query.where(UserTokenCutoff.not_before >= self._cutoff_watermark - SYNC_OVERLAP)
+        elif horizon is not None:
+            query = query.where(UserTokenCutoff.not_before >= horizon)
+        cutoffs = connection.execute(query).all()
+
+        prune = horizon is not None and time.monotonic() >= self._next_prune
+        if prune:
+            # every worker runs this now and then, the deletes are idempotent range scans on the
+            # revoked_on / not_before indexes
+            connection.execute(delete(RevokedToken).where(RevokedToken.revoked_on < horizon))
+            connection.execute(delete(UserTokenCutoff).where(UserTokenCutoff.not_before < horizon))
+            connection.commit()
+
+        with self._lock:
+            for jti, revoked_on in rows:
+                self._add(jti, revoked_on)
+                if self._watermark is None or revoked_on > self._watermark:
+                    self._watermark = revoked_on
+            for user_id, not_before in cutoffs:
+                self._cut_off(user_id, not_before)
+                if self._cutoff_watermark is None or not_before > self._cutoff_watermark:
+                    self._cutoff_watermark = not_before
+            if prune:
+                self._prune(horizon)
+                self._next_prune = time.monotonic() + self.prune_seconds
+
+    # the flask_jwt_extended blocklist check
+    def is_revoked(self, claims):
+        if self.claim_sync():
+            try:
+                with db.engine.connect() as connection:
+                    self.sync(connection)
+            finally:
+                self.release_sync()
+        return self.revoked(claims)
+
+
+def _user_id(subject):
+    try:
+        return int(subject)
+    except (TypeError, ValueError):
+        return None
+
+
+token_denylist = TokenDenylist()
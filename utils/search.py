@@ -0,0 +1,173 @@
+import re
+from collections import defaultdict
+from threading import Lock
+from flask import request
+from sqlalchemy import Float, and_, cast, event, func, literal_column, or_, select
+from models import db, Assignment, Lesson
+from utils.pagination import InvalidQueryParam, decode_cursor, encode_cursor, get_limit
+
+SEARCH_CONFIG = 'english'
+MAX_QUERY_LENGTH = 200
+SEARCH_TYPES = {
+    'lessons': Lesson,
+    'assignments': Assignment
+}
+# indexed columns and their weight class, mirrors SEARCH_VECTORS in models.py
+SEARCH_FIELDS = {
+    Lesson: (('title', 'A'), ('description', 'B'), ('content', 'C')),
+    Assignment: (('title', 'A'), ('description', 'B'))
+}
+# ts_rank's default weights per class, used by the in-process index
+FALLBACK_WEIGHTS = {'A': 1.0, 'B': 0.4, 'C': 0.2}
+
+_WORD = re.compile(r'\w+')
+
+
+def search_type():
+    name = request.args.get('type', 'lessons')
+    if name not in SEARCH_TYPES:
+        raise InvalidQueryParam(f'type must be one of: {", ".join(SEARCH_TYPES)}')
+    return SEARCH_TYPES[name]
+
+
+def search_text():
+    text = (request.args.get('q') or '').strip()
+    if not text:
+        raise InvalidQueryParam('q is required')
+    if len(text) > MAX_QUERY_LENGTH:
+        raise InvalidQueryParam(f'q must be at most {MAX_QUERY_LENGTH} characters')
+    return text
+
+
+# Ranked full-text search over `query` (already filtered to what the caller may see), best match
+# first and paginated with a (rank, id) cursor like keyset_paginate. Postgres matches the generated
+# search_vector column through its GIN index; other databases (the SQLite test setup) use the
+# in-process index below.
+def search_paginate(query, model):
+    text = search_text()
+    limit = get_limit()
+    token = request.args.get('cursor')
+    if db.engine.dialect.name == 'postgresql':
+        return _postgres_search(query, model, text, limit, token)
+    return _fallback_search(query, model, text, limit, token)
+
+
+def _postgres_search(query, model, text, limit, token):
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, text)
+    vector = literal_column(f'{model.__tablename__}.search_vector')
+    # double precision so the rank round-trips through the cursor exactly
+    rank = cast(func.ts_rank_cd(vector, tsquery), Float)
+
+    query = query.add_columns(rank).filter(vector.op('@@')(tsquery))
+    if token:
+        value, last_id = decode_cursor(token, 'rank', rank)
+        query = query.filter(or_(rank < value, and_(rank == value, model.id > last_id)))
+    rows = query.order_by(rank.desc(), model.id).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor('rank', rows[-1][1], rows[-1][0].id)
+    return [item for item, _ in rows], next_cursor
+
+
+def _fallback_search(query, model, text, limit, token):
+    scores = fallback_index.search(model, text)
+    if not scores:
+        return [], None
+
+    # the caller's filters decide which matches are visible
+    visible = query.with_entities(model.id).filter(model.id.in_(scores)).all()
+    ranked = sorted(((scores[row_id], row_id) for row_id, in visible), key=lambda pair: (-pair[0], pair[1]))
+    if token:
+        value, last_id = decode_cursor(token, 'rank', literal_column('rank', Float))
+        ranked = [pair for pair in ranked if pair[0] < value or (pair[0] == value and pair[1] > last_id)]
+
+    page = ranked[:limit]
+    next_cursor = encode_cursor('rank', page[-1][0], page[-1][1]) if len(ranked) > limit else None
+    rows = {item.id: item for item in query.filter(model.id.in_([row_id for _, row_id in page])).all()}
+    return [rows[row_id] for _, row_id in page if row_id in rows], next_cursor
+
+
+def tokenize(text):
+    return _WORD.findall((text or '').lower())
+
+
+# Inverted index for databases without tsvector: term -> {row id: weighted term frequency}, per
+# engine and model. Built from the table on first use; ORM writes mark their rows stale and stale
+# rows are re-read before the next search. Every query term has to match, like websearch_to_tsquery,
+# but there is no stemming.
+class FallbackIndex:
+    def __init__(self):
+        self._lock = Lock()
+        self._indexes = {}
+        self._listening = set()
+
+    def search(self, model, text):
+        terms = set(tokenize(text))
+        if not terms:
+            return {}
+        index = self._get(model)
+        with self._lock:
+            postings = [dict(index['terms'].get(term, {})) for term in terms]
+        if not all(postings):
+            return {}
+        matches = set.intersection(*(set(p) for p in postings))
+        return {row_id: round(sum(p[row_id] for p in postings), 6) for row_id in matches}
+
+    def _get(self, model):
+        key = (str(db.engine.url), model)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is None:
+                index = self._indexes[key] = {'terms': defaultdict(dict), 'docs': {}, 'stale': None}
+                self._listen(model)
+            # None means never loaded: the whole table is read once
+            stale = index['stale']
+            index['stale'] = set()
+
+        query = select(model.id, *(getattr(model, name) for name, _ in SEARCH_FIELDS[model]))
+        if stale is not None:
+            if not stale:
+                return index
+            query = query.where(model.id.in_(stale))
+        rows = db.session.execute(query).all()
+
+        with self._lock:
+            for row_id in stale or ():
+                self._remove(index, row_id)
+            for row in rows:
+                self._remove(index, row[0])
+                self._add(index, model, row[0], row[1:])
+        return index
+
+    def _listen(self, model):
+        if model in self._listening:
+            return
+        for name in ('after_insert', 'after_update', 'after_delete'):
+            event.listen(model, name, self._mark_stale)
+        self._listening.add(model)
+
+    def _add(self, index, model, row_id, values):
+        weights = defaultdict(float)
+        for (_, weight_class), value in zip(SEARCH_FIELDS[model], values):
+            for term in tokenize(value):
+                weights[term] += FALLBACK_WEIGHTS[weight_class]
+        for term, weight in weights.items():
+            index['terms'][term][row_id] = weight
+        index['docs'][row_id] = list(weights)
+
+    def _remove(self, index, row_id):
+        for term in index['docs'].pop(row_id, ()):
+            postings = index['terms'].get(term)
+            if postings is not None:
+                postings.pop(row_id, None)
+
+    def _mark_stale(self, mapper, connection, target):
+        with self._lock:
+            index = self._indexes.get((str(connection.engine.url), mapper.class_))
+            if index is not None and index['stale'] is not None:
+                index['stale'].add(target.id)
+
+
+fallback_index = FallbackIndex()